@@ -0,0 +1,611 @@
+"""In-memory stand-ins for the discord.py objects the honeypot cog touches.
+
+Every method that would hit Discord's REST API goes through ``FakeRest``,
+which adds latency, enforces per-route rate-limit buckets (surfacing 429s
+the way discord.py's HTTP client would: by waiting) and records each call
+so the benchmark can attribute REST usage to a trip.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import discord
+
+_snowflakes = itertools.count()
+
+
+def next_snowflake(when: Optional[datetime] = None) -> int:
+    """Return a unique snowflake whose timestamp is ``when`` (default: now)."""
+    when = when or datetime.now(timezone.utc)
+    return discord.utils.time_snowflake(when) + (next(_snowflakes) % 4096)
+
+
+class RateBucket:
+    __slots__ = ("limit", "per", "remaining", "reset_at", "lock")
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+        self.lock = asyncio.Lock()
+
+
+class FakeRest:
+    """Latency and rate-limit model shared by every fake object."""
+
+    # (limit, per seconds) per route, roughly matching Discord's buckets.
+    ROUTE_LIMITS = {
+        "message.delete": (5, 1.0),
+        "channel.bulk_delete": (1, 1.0),
+        "channel.history": (5, 1.0),
+        "channel.send": (5, 5.0),
+        "message.edit": (5, 5.0),
+        "guild.ban": (5, 1.0),
+        "guild.bulk_ban": (1, 1.0),
+        "guild.kick": (5, 1.0),
+        "member.roles": (10, 10.0),
+        "guild.active_threads": (5, 1.0),
+        "guild.fetch_member": (5, 1.0),
+    }
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.trace: List[tuple] = []
+        self._buckets: Dict[tuple, RateBucket] = {}
+        self._rng_state = 0
+
+    def _jitter(self) -> float:
+        if not self.jitter:
+            return 0.0
+        self._rng_state = (self._rng_state * 1103515245 + 12345) & 0x7FFFFFFF
+        return (self._rng_state / 0x7FFFFFFF) * self.jitter
+
+    async def call(self, route: str, major_id: int, *, actor: Optional[int] = None):
+        limit, per = self.ROUTE_LIMITS.get(route, (50, 1.0))
+        key = (route, major_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = RateBucket(limit, per)
+
+        async with bucket.lock:
+            now = time.monotonic()
+            if now >= bucket.reset_at:
+                bucket.remaining = bucket.limit
+                bucket.reset_at = now + bucket.per
+            if bucket.remaining <= 0:
+                self.rate_limited[route] += 1
+                await asyncio.sleep(bucket.reset_at - now)
+                bucket.remaining = bucket.limit
+                bucket.reset_at = time.monotonic() + bucket.per
+            bucket.remaining -= 1
+
+        started = time.monotonic()
+        await asyncio.sleep(self.latency + self._jitter())
+        self.calls[route] += 1
+        self.trace.append((started, route, major_id, actor, time.monotonic() - started))
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+class FakeAsset:
+    __slots__ = ("url",)
+
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakeUser:
+    """Bare user for contexts where discord.py would hand out a ``User``."""
+
+    def __init__(self, user_id: int, name: str, *, bot: bool = False):
+        self.id = user_id
+        self.name = name
+        self.bot = bot
+        self.display_avatar = FakeAsset(f"https://cdn.invalid/avatars/{user_id}.png")
+        self.created_at = discord.utils.snowflake_time(user_id)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeRole:
+    def __init__(self, guild: "FakeGuild", role_id: int, name: str, permissions=None):
+        self.guild = guild
+        self.id = role_id
+        self.name = name
+        self.permissions = permissions or discord.Permissions.none()
+        self.position = 0
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+
+class FakeMember(discord.Member):
+    """A ``discord.Member`` subclass backed by plain attributes."""
+
+    id = None
+    name = None
+    bot = None
+    roles = None
+    joined_at = None
+    created_at = None
+    display_avatar = None
+    guild = None
+    guild_permissions = None
+
+    def __init__(
+        self,
+        guild: "FakeGuild",
+        user_id: int,
+        name: str,
+        *,
+        bot: bool = False,
+        roles: Iterable[FakeRole] = (),
+        joined_at: Optional[datetime] = None,
+    ):
+        self.guild = guild
+        self.id = user_id
+        self.name = name
+        self.bot = bot
+        self.roles = [guild.default_role, *roles]
+        self.created_at = discord.utils.snowflake_time(user_id)
+        self.joined_at = joined_at or datetime.now(timezone.utc) - timedelta(days=30)
+        self.display_avatar = FakeAsset(f"https://cdn.invalid/avatars/{user_id}.png")
+        value = 0
+        for role in self.roles:
+            value |= role.permissions.value
+        self.guild_permissions = discord.Permissions(value)
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return f"<FakeMember id={self.id} name={self.name!r}>"
+
+    def __eq__(self, other) -> bool:
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    async def add_roles(self, *roles, reason=None, atomic=True):
+        await self.guild.rest.call("member.roles", self.guild.id, actor=self.id)
+        for role in roles:
+            if role not in self.roles:
+                self.roles.append(role)
+        self.guild.record_punishment(self.id, "role")
+
+    async def remove_roles(self, *roles, reason=None, atomic=True):
+        await self.guild.rest.call("member.roles", self.guild.id, actor=self.id)
+        self.roles = [role for role in self.roles if role not in roles]
+
+
+class FakeAttachment:
+    def __init__(self, filename: str, size: int = 1024, content_type: str = "image/png"):
+        self.filename = filename
+        self.size = size
+        self.content_type = content_type
+        self.id = next_snowflake()
+        self.url = f"https://cdn.invalid/attachments/{self.id}/{filename}"
+
+
+class FakeMessage:
+    def __init__(
+        self,
+        channel,
+        author,
+        content: str = "",
+        *,
+        attachments: Iterable[FakeAttachment] = (),
+        created_at: Optional[datetime] = None,
+        embeds: Optional[List[discord.Embed]] = None,
+        view=None,
+    ):
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.clean_content = content
+        self.attachments = list(attachments)
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.id = next_snowflake(self.created_at)
+        self.embeds = list(embeds or [])
+        self.view = view
+        self.deleted = False
+        self.injected_at: Optional[float] = None
+
+    def __repr__(self) -> str:
+        return f"<FakeMessage id={self.id} author={self.author.id} channel={self.channel.id}>"
+
+    async def delete(self, *, delay=None):
+        await self.guild.rest.call("message.delete", self.channel.id, actor=self.author.id)
+        self.channel.remove_messages([self.id])
+
+    async def edit(self, **fields):
+        await self.guild.rest.call("message.edit", self.channel.id)
+        if "embeds" in fields:
+            self.embeds = list(fields["embeds"])
+        if "view" in fields:
+            self.view = fields["view"]
+        return self
+
+
+class _HistoryMixin:
+    """Message storage and the REST-backed operations shared by text-capable channels."""
+
+    def _init_history(self):
+        self.messages: Dict[int, FakeMessage] = {}
+        self.sent: List[FakeMessage] = []
+
+    def add_message(self, message: FakeMessage):
+        self.messages[message.id] = message
+        if self.last_message_id is None or message.id > self.last_message_id:
+            self.last_message_id = message.id
+
+    def remove_messages(self, message_ids: Iterable[int]) -> int:
+        removed = 0
+        now = time.monotonic()
+        for message_id in message_ids:
+            message = self.messages.pop(message_id, None)
+            if message is None:
+                continue
+            message.deleted = True
+            removed += 1
+            self.guild.record_deletion(message.author.id, now)
+        return removed
+
+    def permissions_for(self, member) -> discord.Permissions:
+        if member.id == self.guild.me.id:
+            return self.guild.bot_permissions
+        if self.id in self.guild.hidden_channel_ids:
+            return discord.Permissions.none()
+        return self.guild.member_permissions
+
+    async def send(self, content=None, *, embed=None, embeds=None, view=None, **kwargs):
+        await self.guild.rest.call("channel.send", self.id)
+        if embed is not None:
+            embeds = [embed]
+        message = FakeMessage(self, self.guild.me, content or "", embeds=embeds, view=view)
+        self.sent.append(message)
+        return message
+
+    async def delete_messages(self, messages, *, reason=None):
+        messages = list(messages)
+        if len(messages) == 1:
+            await self.guild.rest.call("message.delete", self.id)
+        else:
+            await self.guild.rest.call("channel.bulk_delete", self.id)
+        self.remove_messages(m.id for m in messages)
+
+    def _ordered(self, *, after=None, before=None, oldest_first=False) -> List[FakeMessage]:
+        after_id = _snowflake_of(after)
+        before_id = _snowflake_of(before)
+        found = [
+            m
+            for m in self.messages.values()
+            if (after_id is None or m.id > after_id) and (before_id is None or m.id < before_id)
+        ]
+        found.sort(key=lambda m: m.id, reverse=not oldest_first)
+        return found
+
+    async def history(self, *, limit=100, before=None, after=None, oldest_first=None):
+        if oldest_first is None:
+            oldest_first = after is not None
+        found = self._ordered(after=after, before=before, oldest_first=oldest_first)
+        if limit is not None:
+            found = found[:limit]
+        for start in range(0, max(len(found), 1), 100):
+            await self.guild.rest.call("channel.history", self.id)
+            for message in found[start : start + 100]:
+                yield message
+
+    async def purge(
+        self,
+        *,
+        limit=100,
+        check=None,
+        before=None,
+        after=None,
+        around=None,
+        oldest_first=None,
+        bulk=True,
+        reason=None,
+    ):
+        to_delete = []
+        async for message in self.history(
+            limit=limit, before=before, after=after, oldest_first=oldest_first
+        ):
+            if check is None or check(message):
+                to_delete.append(message)
+        for start in range(0, len(to_delete), 100):
+            await self.delete_messages(to_delete[start : start + 100], reason=reason)
+        return to_delete
+
+
+def _snowflake_of(value) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return discord.utils.time_snowflake(value, high=True)
+    return value.id
+
+
+class FakeTextChannel(_HistoryMixin, discord.TextChannel):
+    """A ``discord.TextChannel`` subclass so isinstance checks in the cog pass."""
+
+    def __init__(self, guild: "FakeGuild", channel_id: int, name: str):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.last_message_id = None
+        self.category_id = None
+        self.position = 0
+        self.nsfw = False
+        self._init_history()
+
+    def __repr__(self) -> str:
+        return f"<FakeTextChannel id={self.id} name={self.name!r}>"
+
+
+class FakeVoiceChannel(_HistoryMixin, discord.VoiceChannel):
+    """Voice channel text chat; not a TextChannel, like the real thing."""
+
+    def __init__(self, guild: "FakeGuild", channel_id: int, name: str):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.last_message_id = None
+        self.category_id = None
+        self.position = 0
+        self._init_history()
+
+    def __repr__(self) -> str:
+        return f"<FakeVoiceChannel id={self.id} name={self.name!r}>"
+
+
+class FakeThread(_HistoryMixin, discord.Thread):
+    parent = None
+
+    def __init__(self, guild: "FakeGuild", thread_id: int, name: str, parent):
+        self.guild = guild
+        self.id = thread_id
+        self.name = name
+        self.parent = parent
+        self.parent_id = parent.id
+        self.last_message_id = None
+        self.archived = False
+        self._init_history()
+
+    def __repr__(self) -> str:
+        return f"<FakeThread id={self.id} name={self.name!r}>"
+
+    def permissions_for(self, member) -> discord.Permissions:
+        return self.parent.permissions_for(member)
+
+
+class BulkBanResult:
+    def __init__(self, banned, failed):
+        self.banned = banned
+        self.failed = failed
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, name: str, rest: FakeRest, clock=time.monotonic):
+        self.id = guild_id
+        self.name = name
+        self.rest = rest
+        self.clock = clock
+        self.default_role = FakeRole(self, guild_id, "@everyone")
+        self.roles: Dict[int, FakeRole] = {self.default_role.id: self.default_role}
+        self.members: Dict[int, FakeMember] = {}
+        self.channels: Dict[int, object] = {}
+        self.threads: Dict[int, FakeThread] = {}
+        self.hidden_channel_ids = set()
+        self.bans = set()
+        self.bot_permissions = discord.Permissions.all()
+        self.member_permissions = discord.Permissions(
+            view_channel=True,
+            send_messages=True,
+            send_messages_in_threads=True,
+            read_message_history=True,
+        )
+        self.me: Optional[FakeMember] = None
+        self.member_cache = True
+        # Per-user timestamps the benchmark turns into latency figures.
+        self.punished_at: Dict[int, float] = {}
+        self.punishment: Dict[int, str] = {}
+        self.last_deletion_at: Dict[int, float] = defaultdict(float)
+
+    def __repr__(self) -> str:
+        return f"<FakeGuild id={self.id} name={self.name!r}>"
+
+    # -- construction helpers -------------------------------------------------
+
+    def add_role(self, name: str, permissions=None) -> FakeRole:
+        role = FakeRole(self, next_snowflake(), name, permissions)
+        self.roles[role.id] = role
+        return role
+
+    def add_member(self, name: str, **kwargs) -> FakeMember:
+        member = FakeMember(self, next_snowflake(), name, **kwargs)
+        self.members[member.id] = member
+        return member
+
+    def add_text_channel(self, name: str) -> FakeTextChannel:
+        channel = FakeTextChannel(self, next_snowflake(), name)
+        self.channels[channel.id] = channel
+        return channel
+
+    def add_voice_channel(self, name: str) -> FakeVoiceChannel:
+        channel = FakeVoiceChannel(self, next_snowflake(), name)
+        self.channels[channel.id] = channel
+        return channel
+
+    def add_thread(self, parent, name: str) -> FakeThread:
+        thread = FakeThread(self, next_snowflake(), name, parent)
+        self.threads[thread.id] = thread
+        return thread
+
+    def record_punishment(self, user_id: int, kind: str):
+        self.punished_at.setdefault(user_id, self.clock())
+        self.punishment.setdefault(user_id, kind)
+
+    def record_deletion(self, user_id: int, when: float):
+        if when > self.last_deletion_at[user_id]:
+            self.last_deletion_at[user_id] = when
+
+    # -- cache accessors ------------------------------------------------------
+
+    @property
+    def text_channels(self) -> List[FakeTextChannel]:
+        return [c for c in self.channels.values() if isinstance(c, FakeTextChannel)]
+
+    @property
+    def voice_channels(self) -> List[FakeVoiceChannel]:
+        return [c for c in self.channels.values() if isinstance(c, FakeVoiceChannel)]
+
+    @property
+    def stage_channels(self) -> list:
+        return []
+
+    @property
+    def forums(self) -> list:
+        return []
+
+    def get_member(self, user_id: int) -> Optional[FakeMember]:
+        if not self.member_cache and (self.me is None or user_id != self.me.id):
+            # Like a bot running without the members intent.
+            return None
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    def get_thread(self, thread_id: int):
+        return self.threads.get(thread_id)
+
+    def get_channel_or_thread(self, channel_id: int):
+        return self.channels.get(channel_id) or self.threads.get(channel_id)
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self.roles.get(role_id)
+
+    # -- REST -----------------------------------------------------------------
+
+    async def fetch_member(self, user_id: int) -> FakeMember:
+        await self.rest.call("guild.fetch_member", self.id)
+        member = self.members.get(user_id)
+        if member is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Member")
+        return member
+
+    async def active_threads(self) -> List[FakeThread]:
+        await self.rest.call("guild.active_threads", self.id)
+        return [t for t in self.threads.values() if not t.archived]
+
+    async def ban(self, user, *, reason=None, delete_message_days=None, delete_message_seconds=None):
+        await self.rest.call("guild.ban", self.id, actor=user.id)
+        if delete_message_seconds is None:
+            delete_message_seconds = (delete_message_days or 1) * 86400
+        self._ban(user.id, delete_message_seconds)
+
+    async def bulk_ban(self, users, *, reason=None, delete_message_seconds=86400):
+        await self.rest.call("guild.bulk_ban", self.id)
+        if not self.bot_permissions.manage_guild:
+            raise discord.Forbidden(_FakeResponse(403), "Missing Permissions")
+        users = list(users)
+        for user in users:
+            self._ban(user.id, delete_message_seconds)
+        return BulkBanResult([discord.Object(id=u.id) for u in users], [])
+
+    async def kick(self, user, *, reason=None):
+        await self.rest.call("guild.kick", self.id, actor=user.id)
+        self.members.pop(user.id, None)
+        self.record_punishment(user.id, "kick")
+
+    def _ban(self, user_id: int, delete_message_seconds: int = 0):
+        self.bans.add(user_id)
+        self.members.pop(user_id, None)
+        self.record_punishment(user_id, "ban")
+        if delete_message_seconds:
+            # Discord removes the banned user's recent messages server-side.
+            cutoff = discord.utils.time_snowflake(
+                datetime.now(timezone.utc) - timedelta(seconds=delete_message_seconds)
+            )
+            for channel in [*self.channels.values(), *self.threads.values()]:
+                channel.remove_messages(
+                    [
+                        m.id
+                        for m in channel.messages.values()
+                        if m.author.id == user_id and m.id > cutoff
+                    ]
+                )
+
+
+class _FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = "Fake"
+
+
+class FakeBot:
+    """Just enough of Red's bot for the cog's constructor, listeners and views."""
+
+    def __init__(self):
+        self.guilds: Dict[int, FakeGuild] = {}
+        self.user = FakeUser(next_snowflake(), "Honeypot Bot", bot=True)
+        self.intents = discord.Intents.all()
+        self.dynamic_items = []
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        return self.guilds.get(guild_id)
+
+    def get_channel(self, channel_id: int):
+        for guild in self.guilds.values():
+            channel = guild.get_channel_or_thread(channel_id)
+            if channel is not None:
+                return channel
+        return None
+
+    def add_guild(self, guild: FakeGuild):
+        self.guilds[guild.id] = guild
+        guild.me = FakeMember(guild, self.user.id, str(self.user), bot=True)
+        guild.me.guild_permissions = guild.bot_permissions
+        guild.members[guild.me.id] = guild.me
+
+    def add_dynamic_items(self, *items):
+        self.dynamic_items.extend(items)
+
+    def remove_dynamic_items(self, *items):
+        for item in items:
+            if item in self.dynamic_items:
+                self.dynamic_items.remove(item)
+
+    def is_ready(self) -> bool:
+        return True
+
+    async def wait_until_red_ready(self):
+        return None
+
+    async def wait_until_ready(self):
+        return None
@@ -0,0 +1,301 @@
+"""Replay a recorded honeypot trace against fake guilds and report latency figures.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.replay trace-20260101-120000.jsonl --speed 10
+
+Traces come from ``[p]honeypot trace start``. Each guild in the trace is
+rebuilt from its recorded channel counts and settings, and every trap
+message is fed to ``Honeypot.on_message`` at its recorded offset divided by
+``--speed`` (``max`` sends them back to back). Authors that were exempt when
+the trace was recorded are exempted by user ID. The report has the same
+figures as ``benchmarks.run`` plus the REST latencies per stage observed
+while recording, so a performance change can be checked against a real
+incident.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from .fakes import FakeBot, FakeGuild, FakeMessage, FakeRest, next_snowflake
+from .run import (
+    LoopLagMonitor,
+    Trip,
+    dispatch,
+    fmt,
+    init_red_storage,
+    percentile,
+    print_report,
+    report,
+    wait_for_trips,
+)
+
+TRACE_VERSION = 1
+# Settings copied from the trace onto each rebuilt guild.
+REPLAYED_SETTINGS = (
+    "action",
+    "remove_other_roles",
+    "cleanup_mode",
+    "cleanup_concurrency",
+    "cleanup_time_budget",
+    "ban_delete_seconds",
+    "raid_threshold",
+    "raid_window",
+    "shed_trip_threshold",
+)
+
+
+def parse_speed(value: str) -> float:
+    """``max`` (no waiting) or a positive multiplier such as ``1`` or ``10``."""
+    if value == "max":
+        return 0.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def load_trace(path: str) -> Tuple[Dict[int, dict], List[dict], List[dict]]:
+    guilds: Dict[int, dict] = {}
+    messages: List[dict] = []
+    calls: List[dict] = []
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
+            record = json.loads(line)
+            kind = record["type"]
+            if kind == "header":
+                if record["version"] != TRACE_VERSION:
+                    raise SystemExit(f"unsupported trace version {record['version']}")
+            elif kind == "guild":
+                guilds[record["guild"]] = record
+            elif kind == "message":
+                messages.append(record)
+            elif kind == "call":
+                calls.append(record)
+    messages.sort(key=lambda record: record["t"])
+    return guilds, messages, calls
+
+
+class ReplayGuild:
+    """One traced guild rebuilt out of fakes, mapping trace IDs to objects."""
+
+    def __init__(self, index: int, record: dict, args, bot: FakeBot, rest: FakeRest, rng):
+        self.record = record
+        self.settings = record.get("settings") or {}
+        self.rng = rng
+        self.spam_messages = args.spam_messages
+        self.guild = FakeGuild(next_snowflake(), f"replay-{index}", rest)
+        bot.add_guild(self.guild)
+        self.traps: Dict[int, object] = {}
+        self.members: Dict[int, object] = {}
+        self.messages: Dict[int, FakeMessage] = {}
+        self.exempt_ids = set()
+
+        text = record.get("text_channels", 1) - self.settings.get("traps", 1)
+        text = min(args.max_channels, max(1, text))
+        self.channels = [self.guild.add_text_channel(f"general-{c}") for c in range(text)]
+        threads = min(args.max_channels, record.get("threads") or 0)
+        self.channels += [
+            self.guild.add_thread(rng.choice(self.channels[:text]), f"thread-{t}")
+            for t in range(threads)
+        ]
+        voice = min(args.max_channels, record.get("voice_channels") or 0)
+        self.channels += [self.guild.add_voice_channel(f"voice-{v}") for v in range(voice)]
+        self.log = self.guild.add_text_channel("mod-log") if self.settings.get("log") else None
+
+    def trap(self, trace_id: int):
+        channel = self.traps.get(trace_id)
+        if channel is None:
+            channel = self.traps[trace_id] = self.guild.add_text_channel(
+                f"honeypot-{len(self.traps)}"
+            )
+        return channel
+
+    def member(self, trace_id: int):
+        member = self.members.get(trace_id)
+        if member is None:
+            member = self.members[trace_id] = self.guild.add_member(f"user-{len(self.members)}")
+        return member
+
+    def seed_history(self, member) -> List[FakeMessage]:
+        """Messages the offender posted elsewhere before tripping, for cleanup to find."""
+        now = datetime.now(timezone.utc)
+        messages = []
+        for _ in range(self.spam_messages):
+            channel = self.rng.choice(self.channels)
+            age = timedelta(seconds=self.rng.uniform(1, 1800))
+            message = FakeMessage(channel, member, "replayed", created_at=now - age)
+            channel.add_message(message)
+            messages.append(message)
+        return messages
+
+    async def configure(self, cog):
+        conf = cog.config.guild(self.guild)
+        await conf.channel_ids.set(list(channel.id for channel in self.traps.values()))
+        if self.log is not None:
+            await conf.log_channel_id.set(self.log.id)
+        for name in REPLAYED_SETTINGS:
+            if name in self.settings:
+                await getattr(conf, name).set(self.settings[name])
+        if self.settings.get("action") == "role":
+            await conf.punish_role_id.set(self.guild.add_role("Honeypotted").id)
+        if self.exempt_ids:
+            await conf.exempt_user_ids.set(sorted(self.exempt_ids))
+
+
+def build_guilds(args, guilds: Dict[int, dict], messages: List[dict], bot, rest, rng):
+    worlds: Dict[int, ReplayGuild] = {}
+    for record in messages:
+        world = worlds.get(record["guild"])
+        if world is None:
+            # Messages always follow their guild record, unless it was dropped.
+            guild_record = guilds.get(record["guild"], {"guild": record["guild"]})
+            world = worlds[record["guild"]] = ReplayGuild(
+                len(worlds), guild_record, args, bot, rest, rng
+            )
+        world.trap(record["channel"])
+        member = world.member(record["author"])
+        if record["result"] == "exempt":
+            world.exempt_ids.add(member.id)
+    return worlds
+
+
+async def replay(
+    cog, worlds: Dict[int, ReplayGuild], messages: List[dict], speed: float, pending: set
+) -> List[Trip]:
+    trips: List[Trip] = []
+    tripped = set()
+    started = time.monotonic()
+    # Skip the idle stretch between starting the recorder and the first message.
+    first = messages[0]["t"] if messages else 0.0
+    for record in messages:
+        if speed:
+            delay = started + (record["t"] - first) / speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        world = worlds[record["guild"]]
+        member = world.member(record["author"])
+        message = world.messages.get(record["message"])
+        if message is not None:
+            # The same message seen twice, e.g. by a catch-up pass.
+            task = asyncio.ensure_future(cog.on_message(message))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            continue
+
+        message = world.messages[record["message"]] = FakeMessage(
+            world.trap(record["channel"]), member, "replayed"
+        )
+        key = (record["guild"], record["author"])
+        if record["result"] == "trip" and key not in tripped:
+            tripped.add(key)
+            history = world.seed_history(member)
+            trips.append(Trip(world.guild, member.id, time.monotonic(), [*history, message]))
+        dispatch(cog, message, pending)
+    return trips
+
+
+def recorded_summary(messages: List[dict], calls: List[dict]) -> dict:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    outcomes: Dict[str, Counter] = defaultdict(Counter)
+    for record in calls:
+        latencies[record["stage"]].append(record["latency"])
+        outcomes[record["stage"]][record["outcome"]] += 1
+    return {
+        "messages": dict(Counter(record["result"] for record in messages)),
+        "duration_s": messages[-1]["t"] - messages[0]["t"] if messages else 0.0,
+        "stages": {
+            stage: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p99": percentile(values, 99),
+                "outcomes": dict(outcomes[stage]),
+            }
+            for stage, values in latencies.items()
+        },
+    }
+
+
+def print_recorded(recorded: dict):
+    counts = ", ".join(f"{count} {result}" for result, count in recorded["messages"].items())
+    print(f"recorded:         {counts or 'no messages'} over {recorded['duration_s']:.1f} s")
+    for stage, figures in recorded["stages"].items():
+        failed = {k: v for k, v in figures["outcomes"].items() if k != "ok"}
+        extra = "  (" + ", ".join(f"{v} {k}" for k, v in failed.items()) + ")" if failed else ""
+        print(f"  {stage:<24}{figures['count']:>8}  "
+              f"p50 {fmt(figures['p50'])}, p99 {fmt(figures['p99'])}{extra}")
+
+
+async def run(args) -> dict:
+    guilds, messages, calls = load_trace(args.trace)
+    storage = tempfile.mkdtemp(prefix="honeypot-replay-")
+    try:
+        await init_red_storage(storage)
+        import honeypot
+
+        rng = random.Random(args.seed)
+        rest = FakeRest(latency=args.latency, jitter=args.jitter)
+        bot = FakeBot()
+        worlds = build_guilds(args, guilds, messages, bot, rest, rng)
+        cog = honeypot.Honeypot(bot)
+        for world in worlds.values():
+            await world.configure(cog)
+        await cog.cog_load()
+
+        lag = LoopLagMonitor()
+        lag.start()
+        pending: set = set()
+        started = time.monotonic()
+        trips = await replay(cog, worlds, messages, args.speed, pending)
+        await wait_for_trips(trips, args.drain, cleanup=True)
+        elapsed = time.monotonic() - started
+        await lag.stop()
+
+        result = report(args, trips, rest, lag, elapsed, cog)
+        result["recorded"] = recorded_summary(messages, calls)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await cog.cog_unload()
+        return result
+    finally:
+        shutil.rmtree(storage, ignore_errors=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("trace", help="trace file written by [p]honeypot trace")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="replay speed multiplier, e.g. 1 or 10, or 'max' for no waiting")
+    parser.add_argument("--spam-messages", type=int, default=5,
+                        help="messages each offender posted outside the trap before tripping")
+    parser.add_argument("--max-channels", type=int, default=50,
+                        help="cap on channels, threads and voice channels rebuilt per guild")
+    parser.add_argument("--drain", type=float, default=60.0,
+                        help="seconds to wait for outstanding punishments and cleanup")
+    parser.add_argument("--latency", type=float, default=0.05, help="REST round trip in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="extra random REST latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+        print_recorded(result["recorded"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""Drive the honeypot cog against fake guilds and report latency figures.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.run --guilds 20 --rate 500 --trip-rate 5 --duration 15
+
+Ordinary chatter and honeypot trips are injected into ``Honeypot.on_message``
+at the requested rates, each event dispatched as its own task the way
+discord.py does. Every REST call goes through ``FakeRest`` which models
+latency and per-route rate limits, so the numbers reflect how the cog
+schedules API work rather than how fast Python runs.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from .fakes import FakeBot, FakeGuild, FakeMessage, FakeRest, next_snowflake
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Trip:
+    __slots__ = ("guild", "user_id", "injected_at", "messages")
+
+    def __init__(self, guild: FakeGuild, user_id: int, injected_at: float, messages):
+        self.guild = guild
+        self.user_id = user_id
+        self.injected_at = injected_at
+        self.messages = messages
+
+    @property
+    def punished(self) -> bool:
+        return self.user_id in self.guild.punished_at
+
+    @property
+    def cleaned(self) -> bool:
+        return all(message.deleted for message in self.messages)
+
+    @property
+    def time_to_punish(self) -> Optional[float]:
+        punished_at = self.guild.punished_at.get(self.user_id)
+        return None if punished_at is None else punished_at - self.injected_at
+
+    @property
+    def time_to_clean(self) -> Optional[float]:
+        if not self.cleaned:
+            return None
+        return self.guild.last_deletion_at[self.user_id] - self.injected_at
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up, i.e. event-loop stalls."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.monotonic() - started - self.interval))
+
+
+async def init_red_storage(path: str):
+    """Point Red's Config at a throwaway JSON store."""
+    from redbot.core import _drivers, data_manager
+
+    data_manager.basic_config = {
+        "DATA_PATH": path,
+        "COG_PATH_APPEND": "cogs",
+        "CORE_PATH_APPEND": "core",
+        "STORAGE_TYPE": "JSON",
+        "STORAGE_DETAILS": {},
+    }
+    data_manager.instance_name = "honeypot-benchmark"
+    await _drivers.get_driver_class().initialize()
+
+
+def build_guilds(args, bot: FakeBot, rest: FakeRest, rng: random.Random) -> List[dict]:
+    """Create guilds with channels, chatters and pre-existing message history."""
+    now = datetime.now(timezone.utc)
+    worlds = []
+    for g in range(args.guilds):
+        guild = FakeGuild(next_snowflake(), f"guild-{g}", rest)
+        bot.add_guild(guild)
+        channels = [guild.add_text_channel(f"general-{c}") for c in range(args.channels)]
+        if args.threads:
+            channels += [guild.add_thread(rng.choice(channels[: args.channels]), f"thread-{t}")
+                         for t in range(args.threads)]
+        if args.voice:
+            channels += [guild.add_voice_channel(f"voice-{v}") for v in range(args.voice)]
+        trap = guild.add_text_channel("honeypot")
+        log = guild.add_text_channel("mod-log")
+        chatters = [guild.add_member(f"user-{g}-{m}") for m in range(args.members)]
+
+        for channel in channels:
+            for _ in range(args.backlog):
+                age = timedelta(seconds=rng.uniform(0, 2 * 3600))
+                author = rng.choice(chatters)
+                channel.add_message(FakeMessage(channel, author, "hello", created_at=now - age))
+
+        worlds.append(
+            {"guild": guild, "channels": channels, "trap": trap, "log": log, "chatters": chatters}
+        )
+    return worlds
+
+
+async def configure(cog, worlds: List[dict], args):
+    for world in worlds:
+        conf = cog.config.guild(world["guild"])
+        await conf.channel_ids.set([world["trap"].id])
+        await conf.log_channel_id.set(world["log"].id)
+        await conf.action.set(args.action)
+        await conf.cleanup_mode.set(args.cleanup_mode)
+        if args.action == "role":
+            await conf.punish_role_id.set(world["guild"].add_role("Honeypotted").id)
+        if args.raid_threshold is not None:
+            await conf.raid_threshold.set(args.raid_threshold)
+        if args.shed_trips is not None:
+            await conf.shed_trip_threshold.set(args.shed_trips)
+
+
+def dispatch(cog, message: FakeMessage, pending: set):
+    message.channel.add_message(message)
+    task = asyncio.ensure_future(cog.on_message(message))
+    pending.add(task)
+    task.add_done_callback(pending.discard)
+
+
+async def chatter(cog, worlds: List[dict], args, rng: random.Random, pending: set, stop: float):
+    if args.rate <= 0:
+        return
+    interval = 1 / args.rate
+    next_at = time.monotonic()
+    while next_at < stop:
+        world = rng.choice(worlds)
+        channel = rng.choice(world["channels"])
+        dispatch(cog, FakeMessage(channel, rng.choice(world["chatters"]), "hello"), pending)
+        next_at += interval
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def spammers(cog, worlds, args, rng: random.Random, pending: set, stop: float, trips):
+    if args.trip_rate <= 0:
+        return
+    while True:
+        await asyncio.sleep(rng.expovariate(args.trip_rate))
+        if time.monotonic() >= stop:
+            return
+        world = rng.choice(worlds)
+        guild = world["guild"]
+        spammer = guild.add_member(f"spammer-{len(trips)}")
+        messages = []
+        for _ in range(args.spam_messages):
+            message = FakeMessage(rng.choice(world["channels"]), spammer, "free nitro")
+            messages.append(message)
+            dispatch(cog, message, pending)
+        # Let the spam land before the trap message, as it would in practice.
+        await asyncio.sleep(0)
+        bait = FakeMessage(world["trap"], spammer, "free nitro")
+        messages.append(bait)
+        trips.append(Trip(guild, spammer.id, time.monotonic(), messages))
+        dispatch(cog, bait, pending)
+
+
+async def wait_for_trips(trips: List[Trip], timeout: float, *, cleanup: bool):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(t.punished and (t.cleaned or not cleanup) for t in trips):
+            return
+        await asyncio.sleep(0.05)
+
+
+def fmt(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value * 1000:.1f} ms"
+
+
+def report(
+    args, trips: List[Trip], rest: FakeRest, lag: LoopLagMonitor, elapsed: float, cog
+) -> dict:
+    punish = [t.time_to_punish for t in trips if t.time_to_punish is not None]
+    clean = [t.time_to_clean for t in trips if t.time_to_clean is not None]
+    calls = rest.total_calls()
+    # The cog's own per-stage histograms, to see where time-to-punish goes.
+    stages = {
+        stage: {
+            "count": histogram.count,
+            "p50": histogram.quantile(0.5),
+            "p99": histogram.quantile(0.99),
+        }
+        for stage, histogram in cog._stats.histograms.items()
+    }
+    return {
+        "trips": len(trips),
+        "punished": len(punish),
+        "cleaned": len(clean),
+        "elapsed_s": round(elapsed, 3),
+        "time_to_punish": {"p50": percentile(punish, 50), "p99": percentile(punish, 99)},
+        "time_to_clean": {"p50": percentile(clean, 50), "p99": percentile(clean, 99)},
+        "rest_calls": calls,
+        "rest_calls_per_trip": calls / len(trips) if trips else None,
+        "rest_calls_by_route": dict(rest.calls.most_common()),
+        "rate_limited_by_route": dict(rest.rate_limited.most_common()),
+        "stages": stages,
+        "loop_lag": {
+            "p50": percentile(lag.samples, 50),
+            "p99": percentile(lag.samples, 99),
+            "max": max(lag.samples) if lag.samples else None,
+        },
+    }
+
+
+def print_report(result: dict):
+    print(f"trips:            {result['trips']} "
+          f"(punished {result['punished']}, fully cleaned {result['cleaned']})")
+    print(f"time to punish:   p50 {fmt(result['time_to_punish']['p50'])}, "
+          f"p99 {fmt(result['time_to_punish']['p99'])}")
+    print(f"time to clean:    p50 {fmt(result['time_to_clean']['p50'])}, "
+          f"p99 {fmt(result['time_to_clean']['p99'])}")
+    per_trip = result["rest_calls_per_trip"]
+    print(f"REST calls:       {result['rest_calls']} total, "
+          f"{'n/a' if per_trip is None else f'{per_trip:.1f}'} per trip")
+    for route, count in result["rest_calls_by_route"].items():
+        limited = result["rate_limited_by_route"].get(route, 0)
+        print(f"  {route:<24}{count:>8}" + (f"  ({limited} rate limited)" if limited else ""))
+    print("cog stages:")
+    for stage, figures in result["stages"].items():
+        if figures["count"]:
+            print(f"  {stage:<24}{figures['count']:>8}  "
+                  f"p50 {fmt(figures['p50'])}, p99 {fmt(figures['p99'])}")
+    lag = result["loop_lag"]
+    print(f"event-loop lag:   p50 {fmt(lag['p50'])}, p99 {fmt(lag['p99'])}, max {fmt(lag['max'])}")
+
+
+async def run(args) -> dict:
+    storage = tempfile.mkdtemp(prefix="honeypot-bench-")
+    try:
+        await init_red_storage(storage)
+        import honeypot
+
+        rng = random.Random(args.seed)
+        rest = FakeRest(latency=args.latency, jitter=args.jitter)
+        bot = FakeBot()
+        worlds = build_guilds(args, bot, rest, rng)
+        cog = honeypot.Honeypot(bot)
+        await configure(cog, worlds, args)
+        await cog.cog_load()
+        if args.warm:
+            # Pretend the cog has been up long enough to trust its message index.
+            cog._recent_messages.covered_since -= 24 * 3600
+
+        lag = LoopLagMonitor()
+        lag.start()
+        pending: set = set()
+        trips: List[Trip] = []
+        started = time.monotonic()
+        stop = started + args.duration
+        await asyncio.gather(
+            chatter(cog, worlds, args, rng, pending, stop),
+            spammers(cog, worlds, args, rng, pending, stop, trips),
+        )
+        await wait_for_trips(trips, args.drain, cleanup=args.action == "ban" or args.cleanup_mode != "server")
+        elapsed = time.monotonic() - started
+        await lag.stop()
+
+        result = report(args, trips, rest, lag, elapsed, cog)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await cog.cog_unload()
+        return result
+    finally:
+        shutil.rmtree(storage, ignore_errors=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--channels", type=int, default=10, help="text channels per guild")
+    parser.add_argument("--threads", type=int, default=2, help="active threads per guild")
+    parser.add_argument("--voice", type=int, default=1, help="voice channels per guild")
+    parser.add_argument("--members", type=int, default=200, help="chatters per guild")
+    parser.add_argument("--backlog", type=int, default=50,
+                        help="pre-existing messages per channel, spread over two hours")
+    parser.add_argument("--rate", type=float, default=200.0,
+                        help="ordinary messages per second across all guilds")
+    parser.add_argument("--trip-rate", type=float, default=2.0,
+                        help="honeypot trips per second across all guilds")
+    parser.add_argument("--spam-messages", type=int, default=5,
+                        help="messages each spammer posts before hitting the trap")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of injected load")
+    parser.add_argument("--drain", type=float, default=60.0,
+                        help="seconds to wait for outstanding punishments and cleanup")
+    parser.add_argument("--latency", type=float, default=0.05, help="REST round trip in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="extra random REST latency")
+    parser.add_argument("--action", choices=("ban", "kick", "role"), default="ban")
+    parser.add_argument("--cleanup-mode", choices=("scan", "server", "both"), default="both")
+    parser.add_argument("--raid-threshold", type=int, default=None,
+                        help="override the per-guild raid threshold (0 disables raid mode)")
+    parser.add_argument("--shed-trips", type=int, default=None,
+                        help="override the in-progress trips that trigger overload mode (0 disables)")
+    parser.add_argument("--warm", action="store_true",
+                        help="treat the recent-message index as covering the cleanup window")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,163 @@
+import asyncio
+import functools
+import gzip
+import io
+import itertools
+import os
+import sqlite3
+import tempfile
+import time
 from datetime import timedelta
-from typing import Optional
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 
 import discord
 from redbot.core import commands, Config
+from redbot.core.data_manager import cog_data_path
+from redbot.core.utils.chat_formatting import humanize_timedelta
+
+from .federation import GROUP_NAME, FederatedBatch, group_index
+from .fingerprints import ContentIndex, message_fingerprints
+from .journal import (
+    EVENT_CLEANUP,
+    EVENT_EXEMPT,
+    EVENT_FEDERATED_BAN,
+    EVENT_REVIEW_BAN,
+    EVENT_SWEEP,
+    EVENT_TRIP,
+    TripJournal,
+)
+from .logbuffer import MAX_EMBEDS_PER_MESSAGE, LogBuffer, LogEntry, pack_entries
+from .members import MemberCache
+from .overload import ShedState, overloaded
+from .profiler import SamplingProfiler
+from .raid import RaidBatch, RaidDetector
+from .recent import RecentMessageIndex, SeenIds
+from .settings import GuildSettings, GuildSettingsCache, trap_channel_ids
+from .trace import (
+    RESULT_EXEMPT,
+    RESULT_INFLIGHT,
+    RESULT_TRIP,
+    TraceRecorder,
+    call_outcome,
+    call_route,
+)
+from .stats import (
+    STAGE_CLEANUP,
+    STAGE_CLEANUP_CALL,
+    STAGE_DELETE,
+    STAGE_LOG,
+    STAGE_PUNISH,
+    STAGE_TRIP,
+    STAGES,
+    HoneypotStats,
+    format_seconds,
+)
+from .workqueue import (
+    PRIORITY_CLEANUP,
+    PRIORITY_DELETE,
+    PRIORITY_LOG,
+    PRIORITY_PUNISH,
+    GuildWorkQueue,
+    WorkDropped,
+)
 
 ACTION_CHOICES = ("ban", "kick", "role")
 HONEYPOT_REASON = "Triggered honeypot channel"
-
-
-class BanReviewView(discord.ui.View):
-    def __init__(self, cog: "Honeypot", guild_id: int, target_id: int, target_name: str):
-        super().__init__(timeout=86400)
-        self.cog = cog
+SETTINGS_CACHE_SIZE = 5000
+MAX_CLEANUP_TIME_BUDGET = 120
+CLEANUP_WINDOW = timedelta(hours=1)
+BULK_DELETE_LIMIT = 100
+RECENT_MESSAGES_PER_AUTHOR = 50
+RECENT_MESSAGE_AUTHORS = 50000
+RAID_BATCH_DELAY = 2.0
+BULK_BAN_LIMIT = 200
+CLEANUP_MODES = ("server", "scan", "both")
+PURGEABLE_CHANNEL_TYPES = (discord.TextChannel, discord.VoiceChannel, discord.StageChannel)
+MAX_BAN_DELETE_WINDOW = timedelta(days=7)
+MAX_RAID_WINDOW = 300
+OFFENDER_LIST_LIMIT = 15
+PROCESSED_MESSAGE_CACHE_SIZE = 10000
+DELETED_MESSAGE_CACHE_SIZE = 50000
+LOG_FLUSH_DELAY = 2.0
+WORK_QUEUE_WORKERS = 8
+# One queue worker is kept for deletes and punishments, so that is also the
+# most channels a guild can clean up at once.
+MAX_CLEANUP_CONCURRENCY = WORK_QUEUE_WORKERS - 1
+WORK_QUEUE_SHED_DEPTH = 25
+WORK_QUEUE_IDLE_TIMEOUT = 30.0
+QUEUE_STAGES = {
+    PRIORITY_PUNISH: STAGE_PUNISH,
+    PRIORITY_DELETE: STAGE_DELETE,
+    PRIORITY_CLEANUP: STAGE_CLEANUP_CALL,
+    PRIORITY_LOG: STAGE_LOG,
+}
+METRICS_FILE_NAME = "metrics.prom"
+MIN_METRICS_INTERVAL = 15
+JOURNAL_FILE_NAME = "journal.sqlite3"
+JOURNAL_BATCH_SIZE = 500
+JOURNAL_FLUSH_INTERVAL = 1.0
+JOURNAL_MAX_PENDING = 20000
+JOURNAL_EXPORT_PAGE_SIZE = 1000
+JOURNAL_PRUNE_INTERVAL = 3600
+MAX_JOURNAL_RETENTION_DAYS = 3650
+MAX_EXEMPT_AGE = timedelta(days=3650)
+MEMBER_CACHE_SIZE = 2000
+MEMBER_CACHE_TTL = 300.0
+# Without the members intent no update or removal events refresh the cache,
+# so roles used for exemptions may be this stale.
+MEMBER_CACHE_TTL_WITHOUT_INTENT = 30.0
+CATCH_UP_CONCURRENCY = 3
+CATCH_UP_MESSAGE_LIMIT = 1000
+CATCH_UP_MAX_AGE = timedelta(hours=12)
+CURSOR_FLUSH_INTERVAL = 30.0
+MAX_SHED_TRIP_THRESHOLD = 1000
+SHED_CHECK_INTERVAL = 5.0
+SHED_EXIT_FACTOR = 0.5
+SHED_COOLDOWN = 15.0
+TRACE_DIR_NAME = "traces"
+TRACE_FLUSH_INTERVAL = 1.0
+TRACE_MAX_PENDING = 50000
+DEFAULT_TRACE_SIZE_MB = 50
+MAX_TRACE_SIZE_MB = 1024
+PROFILE_INTERVAL = 0.005
+MAX_PROFILE_SECONDS = 300
+PROFILE_TOP_N = 30
+FEDERATION_REASON = "Triggered the honeypot in a federated server"
+FEDERATION_BATCH_DELAY = 5.0
+FEDERATION_CONCURRENCY = 8
+FEDERATED_USER_CACHE_SIZE = 10000
+SWEEP_MODES = ("off", "delete", "punish")
+FINGERPRINT_MAX_ENTRIES = 100000
+FINGERPRINTS_PER_CONTENT = 250
+
+
+class BanReviewButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"honeypot:ban:(?P<guild_id>[0-9]+):(?P<target_id>[0-9]+)",
+):
+    """Ban button whose state lives in its custom_id, so it survives restarts."""
+
+    def __init__(self, guild_id: int, target_id: int, label: str = "Ban User"):
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=discord.ButtonStyle.danger,
+                custom_id=f"honeypot:ban:{guild_id}:{target_id}",
+            )
+        )
         self.guild_id = guild_id
         self.target_id = target_id
-        self.target_name = target_name
 
-    @discord.ui.button(label="Ban User", style=discord.ButtonStyle.danger)
-    async def ban_user(
-        self, interaction: discord.Interaction, button: discord.ui.Button
-    ):
-        guild = self.cog.bot.get_guild(self.guild_id)
-        if not guild:
+    @classmethod
+    async def from_custom_id(
+        cls, interaction: discord.Interaction, item: discord.ui.Button, match
+    ) -> "BanReviewButton":
+        return cls(int(match["guild_id"]), int(match["target_id"]), label=item.label)
+
+    async def callback(self, interaction: discord.Interaction):
+        cog: Optional["Honeypot"] = interaction.client.get_cog("Honeypot")
+        guild = interaction.guild
+        if cog is None or guild is None or guild.id != self.guild_id:
             await interaction.response.send_message(
                 "Guild is unavailable. Try again later.", ephemeral=True
             )
@@ -35,11 +171,12 @@ class BanReviewView(discord.ui.View):
             )
             return
 
+        settings = await cog._get_settings(guild)
         try:
             await guild.ban(
                 discord.Object(id=self.target_id),
                 reason=HONEYPOT_REASON,
-                delete_message_days=1,
+                delete_message_seconds=settings.server_delete_seconds,
             )
         except (discord.Forbidden, discord.HTTPException):
             await interaction.response.send_message(
@@ -48,13 +185,46 @@ class BanReviewView(discord.ui.View):
             )
             return
 
-        button.disabled = True
-        button.label = "User Banned"
-        await interaction.response.edit_message(view=self)
+        cog._journal.record(
+            EVENT_REVIEW_BAN, guild.id, user_id=self.target_id, action="ban", outcome="ok"
+        )
+        user = interaction.client.get_user(self.target_id)
+        cog._federate_ban(guild, self.target_id, str(user) if user else str(self.target_id))
+        # Rebuild the message's buttons rather than keeping a View per log
+        # message; only the clicked one changes.
+        view = discord.ui.View.from_message(interaction.message, timeout=None)
+        for item in view.children:
+            if getattr(item, "custom_id", None) == self.custom_id:
+                item.disabled = True
+                item.label = self._banned_label(item.label)
+        view.stop()
+        await interaction.response.edit_message(view=view)
         await interaction.followup.send(
-            f"{self.target_name} has been banned.", ephemeral=True
+            f"<@{self.target_id}> has been banned.",
+            ephemeral=True,
+            allowed_mentions=discord.AllowedMentions.none(),
         )
-        self.stop()
+
+    @staticmethod
+    def _banned_label(label: Optional[str]) -> str:
+        if not label or label == "Ban User":
+            return "User Banned"
+        if label.startswith("Ban "):
+            return f"Banned {label[4:]}"[:80]
+        return label
+
+
+class CleanupResult:
+    """Outcome of a guild-wide cleanup sweep, including partial progress."""
+
+    __slots__ = ("deleted", "channels_unfinished", "channels_shed", "channels_idle", "time_budget")
+
+    def __init__(self, time_budget: Optional[float] = None):
+        self.deleted = 0
+        self.channels_unfinished = 0
+        self.channels_shed = 0
+        self.channels_idle = 0
+        self.time_budget = time_budget
 
 
 class Honeypot(commands.Cog):
@@ -65,20 +235,411 @@ class Honeypot(commands.Cog):
         self.config = Config.get_conf(self, identifier=948372645)
         self.config.register_guild(
             channel_id=None,
+            channel_ids=[],
             exempt_roles=[],
+            exempt_user_ids=[],
+            exempt_permissions=0,
+            exempt_account_age=0,
+            exempt_join_age=0,
             log_channel_id=None,
             action="ban",
             punish_role_id=None,
             remove_other_roles=False,
             role_exception_ids=[],
+            cleanup_concurrency=5,
+            cleanup_time_budget=15,
+            raid_threshold=10,
+            raid_window=10,
+            cleanup_mode="both",
+            ban_delete_seconds=86400,
+            trap_cursors={},
+            shed_trip_threshold=25,
+            sweep_mode="off",
+            federation_opt_in=False,
+        )
+        self.config.register_global(
+            metrics_interval=0,
+            journal_retention_days=90,
+            federation_groups={},
+        )
+        self._settings = GuildSettingsCache(SETTINGS_CACHE_SIZE)
+        # Process-wide trap index (channel ID -> guild ID) so on_message can
+        # discard non-trap traffic with a single dict lookup.
+        self._trap_channels: Dict[int, int] = {}
+        self._guild_traps: Dict[int, FrozenSet[int]] = {}
+        # Guilds that index message fingerprints for spam wave sweeps.
+        self._sweep_guilds: Set[int] = set()
+        self._content_index = ContentIndex(
+            max_age=CLEANUP_WINDOW.total_seconds(),
+            per_fingerprint=FINGERPRINTS_PER_CONTENT,
+            max_entries=FINGERPRINT_MAX_ENTRIES,
+        )
+        self._recent_messages = RecentMessageIndex(
+            max_age=CLEANUP_WINDOW.total_seconds(),
+            per_author=RECENT_MESSAGES_PER_AUTHOR,
+            max_authors=RECENT_MESSAGE_AUTHORS,
         )
+        self._raid_detectors: Dict[int, RaidDetector] = {}
+        self._raid_batches: Dict[int, RaidBatch] = {}
+        # Federation group name -> member guild IDs, and the reverse mapping.
+        self._federations: Dict[str, FrozenSet[int]] = {}
+        self._guild_federation: Dict[int, str] = {}
+        # Guilds that opted in to sending and receiving federated bans.
+        self._federation_opt_ins: Set[int] = set()
+        self._federated_batches: Dict[int, FederatedBatch] = {}
+        self._federated_users = SeenIds(FEDERATED_USER_CACHE_SIZE)
+        # Receiving guilds banned into at once, across every federation.
+        self._federation_slots = asyncio.Semaphore(FEDERATION_CONCURRENCY)
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._inflight_trips: Set[Tuple[int, int]] = set()
+        self._inflight_per_guild: Dict[int, int] = {}
+        # Member lookups still running, shared by concurrent messages of one author.
+        self._resolving: Dict[Tuple[int, int], asyncio.Future] = {}
+        # Guilds whose trip pipeline is degraded to delete + punish only.
+        self._shedding: Dict[int, ShedState] = {}
+        # Opt-in incident recorder; None unless an owner started one.
+        self._trace: Optional[TraceRecorder] = None
+        self._profiler: Optional[SamplingProfiler] = None
+        self._cleanup_tasks: Set[asyncio.Task] = set()
+        self._log_buffers: Dict[int, LogBuffer] = {}
+        self._unloading = False
+        self._work_queues: Dict[int, GuildWorkQueue] = {}
+        # Guild ID -> text channels where the bot can both read history and
+        # delete messages; rebuilt lazily after permission changes.
+        self._eligible_channels: Dict[int, Set[int]] = {}
+        self._processed_messages = SeenIds(PROCESSED_MESSAGE_CACHE_SIZE)
+        # Messages already deleted (by Discord's ban pruning, moderators or the
+        # author), so cleanup neither requests nor counts them again.
+        self._deleted_messages = SeenIds(DELETED_MESSAGE_CACHE_SIZE)
+        # Members fetched over REST when the bot runs without a member cache.
+        self._member_cache = MemberCache(
+            maxsize=MEMBER_CACHE_SIZE,
+            ttl=MEMBER_CACHE_TTL if bot.intents.members else MEMBER_CACHE_TTL_WITHOUT_INTENT,
+        )
+        # Trap channel ID -> newest message ID handed to the trip pipeline,
+        # persisted in batches so a restart can pick up where it left off.
+        self._trap_cursors: Dict[int, int] = {}
+        self._dirty_cursor_guilds: Set[int] = set()
+        self._cursor_task: Optional[asyncio.Task] = None
+        self._catch_up_task: Optional[asyncio.Task] = None
+        self._stats = HoneypotStats()
+        self._metrics_task: Optional[asyncio.Task] = None
+        self._journal = TripJournal(
+            cog_data_path(self) / JOURNAL_FILE_NAME,
+            batch_size=JOURNAL_BATCH_SIZE,
+            flush_interval=JOURNAL_FLUSH_INTERVAL,
+            max_pending=JOURNAL_MAX_PENDING,
+        )
+        self._journal_prune_task: Optional[asyncio.Task] = None
+
+    async def cog_load(self):
+        all_guilds = await self.config.all_guilds()
+        for guild_id, data in all_guilds.items():
+            settings = GuildSettings(data)
+            self._settings.put(guild_id, settings)
+            self._index_traps(guild_id, settings.trap_channel_ids)
+            self._index_sweep(guild_id, settings)
+            self._index_federation(guild_id, settings)
+            for channel_id, message_id in (data.get("trap_cursors") or {}).items():
+                if int(channel_id) in settings.trap_channel_ids:
+                    self._trap_cursors[int(channel_id)] = message_id
+        self._load_federations(await self.config.federation_groups())
+        self._start_metrics_writer(await self.config.metrics_interval())
+        await self._journal.open()
+        self.bot.add_dynamic_items(BanReviewButton)
+        self._journal_prune_task = asyncio.create_task(self._prune_journal_periodically())
+        self._cursor_task = asyncio.create_task(self._save_trap_cursors_periodically())
+        self._schedule_catch_up()
+
+    def _index_traps(self, guild_id: int, channel_ids: FrozenSet[int]):
+        for channel_id in self._guild_traps.pop(guild_id, ()):
+            self._trap_channels.pop(channel_id, None)
+        if channel_ids:
+            self._guild_traps[guild_id] = channel_ids
+            for channel_id in channel_ids:
+                self._trap_channels[channel_id] = guild_id
+            self._recent_messages.watch(guild_id)
+        else:
+            self._recent_messages.unwatch(guild_id)
+
+    def _index_sweep(self, guild_id: int, settings: GuildSettings):
+        if settings.sweep_mode != "off" and settings.trap_channel_ids:
+            self._sweep_guilds.add(guild_id)
+        else:
+            self._sweep_guilds.discard(guild_id)
+
+    def _index_federation(self, guild_id: int, settings: GuildSettings):
+        if settings.federation_opt_in:
+            self._federation_opt_ins.add(guild_id)
+        else:
+            self._federation_opt_ins.discard(guild_id)
+
+    def _load_federations(self, groups: Dict[str, list]):
+        self._federations, self._guild_federation = group_index(groups)
+
+    async def cog_unload(self):
+        self._unloading = True
+        self.bot.remove_dynamic_items(BanReviewButton)
+        self._start_metrics_writer(0)
+        if self._profiler is not None:
+            self._profiler.stop()
+        if self._catch_up_task is not None:
+            self._catch_up_task.cancel()
+        for task in self._cleanup_tasks:
+            task.cancel()
+        for state in self._shedding.values():
+            if state.watcher:
+                # The watcher posts its summary as it exits.
+                state.watcher.cancel()
+        for buffer in self._log_buffers.values():
+            if buffer.timer:
+                buffer.timer.cancel()
+                buffer.timer = None
+        batches = list(self._raid_batches.values())
+        self._raid_batches.clear()
+        for batch in batches:
+            if batch.timer:
+                batch.timer.cancel()
+        pending = [self._process_raid_batch(batch) for batch in batches]
+        federated = list(self._federated_batches.items())
+        self._federated_batches.clear()
+        for guild_id, batch in federated:
+            if batch.timer:
+                batch.timer.cancel()
+            guild = self.bot.get_guild(guild_id)
+            if guild is not None:
+                pending.append(self._process_federated_batch(guild, batch))
+        pending.extend(self._background_tasks)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self._flush_all_logs()
+        queues = list(self._work_queues.values())
+        self._work_queues.clear()
+        await asyncio.gather(*(queue.close() for queue in queues), return_exceptions=True)
+        await self._stop_trace()
+        if self._journal_prune_task is not None:
+            self._journal_prune_task.cancel()
+        if self._cursor_task is not None:
+            self._cursor_task.cancel()
+        await self._save_trap_cursors()
+        await self._journal.close()
+
+    async def red_delete_data_for_user(self, *, requester, user_id: int):
+        await self._journal.delete_user(user_id)
+
+    async def _queue_call(
+        self, guild_id: int, priority: int, factory, *, droppable: bool = False
+    ):
+        queue = self._work_queues.get(guild_id)
+        if queue is None:
+            queue = self._work_queues[guild_id] = GuildWorkQueue(
+                workers=WORK_QUEUE_WORKERS,
+                shed_depth=WORK_QUEUE_SHED_DEPTH,
+                idle_timeout=WORK_QUEUE_IDLE_TIMEOUT,
+            )
+        trace = self._trace
+        if trace is None:
+            with self._stats.time(QUEUE_STAGES[priority]):
+                return await queue.run(priority, factory, droppable=droppable)
+
+        started = time.perf_counter()
+        error = None
+        try:
+            with self._stats.time(QUEUE_STAGES[priority]):
+                return await queue.run(priority, factory, droppable=droppable)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            trace.call(
+                guild_id,
+                QUEUE_STAGES[priority],
+                call_route(factory),
+                call_outcome(error),
+                time.perf_counter() - started,
+            )
+
+    async def _stop_trace(self) -> Optional[TraceRecorder]:
+        trace, self._trace = self._trace, None
+        if trace is not None:
+            await trace.close()
+        return trace
+
+    def _trace_message(
+        self,
+        message: discord.Message,
+        settings: GuildSettings,
+        result: str,
+        reason: str = None,
+    ):
+        trace = self._trace
+        if not trace.guild_seen(message.guild.id):
+            trace.guild(
+                message.guild,
+                {
+                    "action": settings.action,
+                    "remove_other_roles": settings.remove_other_roles,
+                    "traps": len(settings.trap_channel_ids),
+                    "log": bool(settings.log_channel_id),
+                    "cleanup_mode": settings.cleanup_mode,
+                    "cleanup_concurrency": settings.cleanup_concurrency,
+                    "cleanup_time_budget": settings.cleanup_time_budget,
+                    "ban_delete_seconds": settings.ban_delete_seconds,
+                    "raid_threshold": settings.raid_threshold,
+                    "raid_window": settings.raid_window,
+                    "shed_trip_threshold": settings.shed_trip_threshold,
+                },
+            )
+        trace.message(message, result, reason)
+
+    def _start_metrics_writer(self, interval: int):
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+        if interval:
+            self._metrics_task = asyncio.create_task(self._write_metrics_periodically(interval))
+
+    async def _write_metrics_periodically(self, interval: int):
+        path = cog_data_path(self) / METRICS_FILE_NAME
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await loop.run_in_executor(
+                    None, self._write_metrics_file, path, self._stats.render_prometheus()
+                )
+            except OSError:
+                pass
+
+    async def _prune_journal_periodically(self):
+        while True:
+            days = await self.config.journal_retention_days()
+            if days:
+                try:
+                    await self._journal.prune(time.time() - days * 86400)
+                except sqlite3.Error:
+                    pass
+            await asyncio.sleep(JOURNAL_PRUNE_INTERVAL)
+
+    @staticmethod
+    def _write_metrics_file(path, text: str):
+        # Write then rename so scrapers never read a half-written file.
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_text(text, encoding="utf-8")
+        os.replace(temp_path, path)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def _get_settings(self, guild: discord.Guild) -> GuildSettings:
+        settings = self._settings.get(guild.id)
+        if settings is None:
+            settings = await self._refresh_settings(guild)
+        return settings
+
+    async def _refresh_settings(self, guild: discord.Guild) -> GuildSettings:
+        data = await self.config.guild(guild).all()
+        settings = GuildSettings(data, self._settings.get(guild.id))
+        self._settings.put(guild.id, settings)
+        self._index_traps(guild.id, settings.trap_channel_ids)
+        self._index_sweep(guild.id, settings)
+        self._index_federation(guild.id, settings)
+        self._seed_trap_cursors(guild, settings.trap_channel_ids)
+        return settings
+
+    def _seed_trap_cursors(self, guild: discord.Guild, channel_ids: FrozenSet[int]):
+        # A trap without a cursor starts from "now"; catching up on history
+        # from before it became a trap would punish old conversations.
+        for channel_id in channel_ids:
+            if channel_id in self._trap_cursors:
+                continue
+            channel = guild.get_channel(channel_id)
+            last_id = getattr(channel, "last_message_id", None)
+            self._trap_cursors[channel_id] = last_id or discord.utils.time_snowflake(
+                discord.utils.utcnow()
+            )
+            self._dirty_cursor_guilds.add(guild.id)
+
+    def _advance_trap_cursor(self, guild_id: int, channel_id: int, message_id: int):
+        if message_id > self._trap_cursors.get(channel_id, 0):
+            self._trap_cursors[channel_id] = message_id
+            self._dirty_cursor_guilds.add(guild_id)
+
+    async def _save_trap_cursors_periodically(self):
+        while True:
+            await asyncio.sleep(CURSOR_FLUSH_INTERVAL)
+            await self._save_trap_cursors()
+
+    async def _save_trap_cursors(self):
+        dirty, self._dirty_cursor_guilds = self._dirty_cursor_guilds, set()
+        for guild_id in dirty:
+            channel_ids = self._guild_traps.get(guild_id, ())
+            cursors = {
+                str(channel_id): self._trap_cursors[channel_id]
+                for channel_id in channel_ids
+                if channel_id in self._trap_cursors
+            }
+            await self.config.guild_from_id(guild_id).trap_cursors.set(cursors)
+
+    def _schedule_catch_up(self):
+        if self._unloading or (self._catch_up_task and not self._catch_up_task.done()):
+            return
+        self._catch_up_task = asyncio.create_task(self._catch_up_traps())
+
+    async def _catch_up_traps(self):
+        """Feed trap messages posted while the bot was away into the trip pipeline."""
+        await self.bot.wait_until_red_ready()
+        semaphore = asyncio.Semaphore(CATCH_UP_CONCURRENCY)
+        oldest = discord.utils.time_snowflake(discord.utils.utcnow() - CATCH_UP_MAX_AGE)
+
+        async def catch_up(guild: discord.Guild, channel_id: int):
+            async with semaphore:
+                channel = guild.get_channel(channel_id)
+                cursor = self._trap_cursors.get(channel_id)
+                if channel is None or cursor is None:
+                    return
+                if channel.last_message_id is not None and channel.last_message_id <= cursor:
+                    return
+                try:
+                    async for message in channel.history(
+                        limit=CATCH_UP_MESSAGE_LIMIT,
+                        after=discord.Object(id=max(cursor, oldest)),
+                        oldest_first=True,
+                    ):
+                        await self.on_message(message)
+                except discord.HTTPException:
+                    pass
+
+        jobs = []
+        for guild_id, channel_ids in list(self._guild_traps.items()):
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                continue
+            self._seed_trap_cursors(guild, channel_ids)
+            jobs.extend(catch_up(guild, channel_id) for channel_id in channel_ids)
+        await asyncio.gather(*jobs)
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        self._schedule_catch_up()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Fires again after a session could not be resumed, in which case
+        # Discord does not replay the events we missed, so the recent message
+        # index no longer covers the last hour either.
+        self._recent_messages.clear()
+        self._schedule_catch_up()
 
     @commands.group(name="honeypot", invoke_without_command=True)
     @commands.admin()
     async def honeypot(self, ctx: commands.Context):
         """Manage honeypot settings."""
         data = await self.config.guild(ctx.guild).all()
-        channel = ctx.guild.get_channel(data.get("channel_id"))
+        channels = self._resolve_trap_channels(ctx.guild, trap_channel_ids(data))
         log_channel = ctx.guild.get_channel(data.get("log_channel_id"))
         exempt_ids = data.get("exempt_roles", [])
         action = (data.get("action") or "ban").lower()
@@ -102,8 +663,11 @@ class Honeypot(commands.Cog):
         )
 
         # Status section
-        if channel:
-            status = f"**Active** - Monitoring {channel.mention}"
+        if channels:
+            if len(channels) == 1:
+                status = f"**Active** - Monitoring {channels[0].mention}"
+            else:
+                status = f"**Active** - Monitoring {len(channels)} trap channels"
             embed.color = discord.Color.green()
         else:
             status = "**Inactive** - No trap channel configured"
@@ -111,9 +675,15 @@ class Honeypot(commands.Cog):
 
         embed.add_field(name="Status", value=status, inline=False)
 
+        if channels:
+            trap_display = ", ".join(c.mention for c in channels[:5])
+            if len(channels) > 5:
+                trap_display += f" *+{len(channels) - 5} more*"
+        else:
+            trap_display = "*Not set*"
         embed.add_field(
-            name="Trap Channel",
-            value=channel.mention if channel else "*Not set*",
+            name="Trap Channels" if len(channels) > 1 else "Trap Channel",
+            value=trap_display,
             inline=True,
         )
         embed.add_field(
@@ -155,26 +725,45 @@ class Honeypot(commands.Cog):
         prefix = ctx.clean_prefix
         commands_text = (
             f"`{prefix}honeypot set <channel>` - Set the trap channel\n"
+            f"`{prefix}honeypot trap add/remove <channel>` - Manage extra trap channels\n"
             f"`{prefix}honeypot log [channel]` - Set/clear log channel\n"
             f"`{prefix}honeypot action <ban|kick|role>` - Choose the punishment\n"
             f"`{prefix}honeypot punishrole [role]` - Set or clear the punish role\n"
             f"`{prefix}honeypot striproles <true|false>` - Toggle stripping old roles\n"
             f"`{prefix}honeypot stripexception` - Manage strip role exceptions\n"
-            f"`{prefix}honeypot exempt` - View exempt roles\n"
-            f"`{prefix}honeypot exempt add <role>` - Add exempt role\n"
-            f"`{prefix}honeypot exempt remove <role>` - Remove exempt role"
+            f"`{prefix}honeypot exempt` - View exemptions (roles, users, permissions, age)\n"
+            f"`{prefix}honeypot exempt add/remove <role>` - Manage exempt roles"
         )
         embed.add_field(name="Commands", value=commands_text, inline=False)
+        tuning_commands_text = (
+            f"`{prefix}honeypot cleanup` - Tune history cleanup speed\n"
+            f"`{prefix}honeypot raid <threshold> [window]` - Batch bans during raids\n"
+            f"`{prefix}honeypot overload` - When to skip cleanup and logs under load\n"
+            f"`{prefix}honeypot sweep <off|delete|punish>` - Sweep identical spam from other accounts\n"
+            f"`{prefix}honeypot federation [optin]` - Share bans with partner servers\n"
+            f"`{prefix}honeypot journal [export]` - Trip history for this server"
+        )
+        embed.add_field(name="Tuning", value=tuning_commands_text, inline=False)
+        owner_commands_text = (
+            f"`{prefix}honeypot stats` - Latency and error stats\n"
+            f"`{prefix}honeypot trace` - Record an anonymized trace for replay\n"
+            f"`{prefix}honeypot profile <seconds>` - Profile the cog during a slowdown\n"
+            f"`{prefix}honeypot federation create|add|remove` - Manage federation groups"
+        )
+        embed.add_field(name="Bot Owner Commands", value=owner_commands_text, inline=False)
 
-        embed.set_footer(text="Users who message in the trap channel will be punished automatically.")
+        embed.set_footer(text="Users who message in a trap channel will be punished automatically.")
 
         await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
 
     @honeypot.command(name="set", aliases=["channel"])
     @commands.admin()
     async def honeypot_set(self, ctx: commands.Context, channel: discord.TextChannel):
-        """Set or update the honeypot channel."""
-        await self.config.guild(ctx.guild).channel_id.set(channel.id)
+        """Set or update the honeypot channel, replacing any other trap channels."""
+        guild_conf = self.config.guild(ctx.guild)
+        await guild_conf.channel_ids.set([channel.id])
+        await guild_conf.channel_id.set(None)
+        await self._refresh_settings(ctx.guild)
         embed = discord.Embed(
             title="Trap Channel Updated",
             description=f"Now monitoring {channel.mention} for intruders.",
@@ -183,6 +772,68 @@ class Honeypot(commands.Cog):
         embed.set_footer(text="Anyone who sends a message there will be punished.")
         await ctx.send(embed=embed)
 
+    @honeypot.group(name="trap", aliases=["traps"], invoke_without_command=True)
+    @commands.admin()
+    async def honeypot_trap(self, ctx: commands.Context):
+        """Manage the guild's trap channels."""
+        await self._send_trap_list(ctx)
+
+    @honeypot_trap.command(name="add")
+    @commands.admin()
+    async def honeypot_trap_add(self, ctx: commands.Context, channel: discord.TextChannel):
+        """Add another trap channel."""
+        guild_conf = self.config.guild(ctx.guild)
+        current = trap_channel_ids(await guild_conf.all())
+        if channel.id in current:
+            embed = discord.Embed(
+                title="Already Trapped",
+                description=f"{channel.mention} is already a trap channel.",
+                color=discord.Color.orange(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        await guild_conf.channel_ids.set(sorted(current | {channel.id}))
+        await guild_conf.channel_id.set(None)
+        await self._refresh_settings(ctx.guild)
+        embed = discord.Embed(
+            title="Trap Channel Added",
+            description=f"Now also monitoring {channel.mention} for intruders.",
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot_trap.command(name="remove")
+    @commands.admin()
+    async def honeypot_trap_remove(self, ctx: commands.Context, channel: discord.TextChannel):
+        """Stop using a channel as a trap."""
+        guild_conf = self.config.guild(ctx.guild)
+        current = trap_channel_ids(await guild_conf.all())
+        if channel.id not in current:
+            embed = discord.Embed(
+                title="Not a Trap",
+                description=f"{channel.mention} is not a trap channel.",
+                color=discord.Color.orange(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        await guild_conf.channel_ids.set(sorted(current - {channel.id}))
+        await guild_conf.channel_id.set(None)
+        await self._refresh_settings(ctx.guild)
+        embed = discord.Embed(
+            title="Trap Channel Removed",
+            description=f"{channel.mention} is no longer monitored.",
+            color=discord.Color.red(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot_trap.command(name="list")
+    @commands.admin()
+    async def honeypot_trap_list(self, ctx: commands.Context):
+        """List the guild's trap channels."""
+        await self._send_trap_list(ctx)
+
     @honeypot.command(name="log")
     @commands.admin()
     async def honeypot_log(
@@ -191,6 +842,7 @@ class Honeypot(commands.Cog):
         """Set or clear the honeypot log channel."""
         if channel is None:
             await self.config.guild(ctx.guild).log_channel_id.set(None)
+            await self._refresh_settings(ctx.guild)
             embed = discord.Embed(
                 title="Logging Disabled",
                 description="Honeypot events will no longer be logged.",
@@ -200,6 +852,7 @@ class Honeypot(commands.Cog):
             return
 
         await self.config.guild(ctx.guild).log_channel_id.set(channel.id)
+        await self._refresh_settings(ctx.guild)
         embed = discord.Embed(
             title="Log Channel Updated",
             description=f"Honeypot events will be logged to {channel.mention}.",
@@ -222,6 +875,7 @@ class Honeypot(commands.Cog):
             return
 
         await self.config.guild(ctx.guild).action.set(action)
+        await self._refresh_settings(ctx.guild)
         embed = discord.Embed(
             title="Punishment Updated",
             description=f"The honeypot now uses **{action}**.",
@@ -235,6 +889,7 @@ class Honeypot(commands.Cog):
         """Configure the role to apply when the action is set to role."""
         role_id = role.id if role else None
         await self.config.guild(ctx.guild).punish_role_id.set(role_id)
+        await self._refresh_settings(ctx.guild)
 
         if role:
             embed = discord.Embed(
@@ -255,6 +910,7 @@ class Honeypot(commands.Cog):
     async def honeypot_strip_roles(self, ctx: commands.Context, toggle: bool):
         """Toggle whether existing roles are removed before applying the punish role."""
         await self.config.guild(ctx.guild).remove_other_roles.set(toggle)
+        await self._refresh_settings(ctx.guild)
         state = "enabled" if toggle else "disabled"
         embed = discord.Embed(
             title="Role Removal Updated",
@@ -263,174 +919,1613 @@ class Honeypot(commands.Cog):
         )
         await ctx.send(embed=embed)
 
-    @honeypot.group(name="stripexception", aliases=["stripex"], invoke_without_command=True)
+    @honeypot.group(name="cleanup", invoke_without_command=True)
     @commands.admin()
-    async def honeypot_strip_exception(self, ctx: commands.Context):
-        """Manage exception roles that are kept when stripping roles."""
-        await self._send_strip_exception_list(ctx)
+    async def honeypot_cleanup(self, ctx: commands.Context):
+        """Show how offender history is cleaned up after a trip."""
+        settings = await self._get_settings(ctx.guild)
+        budget = settings.cleanup_time_budget
+        prefix = ctx.clean_prefix
+        embed = discord.Embed(
+            title="Cleanup Settings",
+            description=(
+                f"Mode: **{settings.cleanup_mode.title()}**\n"
+                f"Server-side ban window: **{humanize_timedelta(seconds=settings.ban_delete_seconds) or 'None'}**\n"
+                f"Parallel channels: **{min(settings.cleanup_concurrency, MAX_CLEANUP_CONCURRENCY)}**\n"
+                f"Time budget: **{f'{budget:g}s' if budget else 'Unlimited'}**"
+            ),
+            color=discord.Color.blue(),
+        )
+        embed.add_field(
+            name="Manage",
+            value=(
+                f"`{prefix}honeypot cleanup mode <server|scan|both>`\n"
+                f"`{prefix}honeypot cleanup window <duration>`\n"
+                f"`{prefix}honeypot cleanup concurrency <1-{MAX_CLEANUP_CONCURRENCY}>`\n"
+                f"`{prefix}honeypot cleanup budget <0-{MAX_CLEANUP_TIME_BUDGET}>`"
+            ),
+            inline=False,
+        )
+        await ctx.send(embed=embed)
 
-    @honeypot_strip_exception.command(name="add")
+    @honeypot_cleanup.command(name="mode")
     @commands.admin()
-    async def honeypot_strip_exception_add(self, ctx: commands.Context, role: discord.Role):
-        """Add a role to the role stripping exception list."""
-        async with self.config.guild(ctx.guild).role_exception_ids() as exception_ids:
-            if role.id in exception_ids:
-                embed = discord.Embed(
-                    title="Already Exception",
-                    description=f"{role.mention} is already kept during stripping.",
-                    color=discord.Color.orange(),
-                )
-                await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
-                return
-            exception_ids.append(role.id)
+    async def honeypot_cleanup_mode(self, ctx: commands.Context, mode: str):
+        """Choose who removes offender history: `server`, `scan` or `both`.
+
+        `server` lets Discord delete history as part of the ban and skips the
+        channel sweep for bans. `scan` sweeps channels only. `both` does both.
+        Kick and role punishments always sweep.
+        """
+        mode = mode.lower()
+        if mode not in CLEANUP_MODES:
+            embed = discord.Embed(
+                title="Invalid Mode",
+                description=f"Choose one of: {', '.join(CLEANUP_MODES)}.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
 
+        await self.config.guild(ctx.guild).cleanup_mode.set(mode)
+        await self._refresh_settings(ctx.guild)
         embed = discord.Embed(
-            title="Exception Added",
-            description=f"{role.mention} will be kept when roles are stripped.",
+            title="Cleanup Updated",
+            description=f"Cleanup now uses **{mode}** mode.",
             color=discord.Color.green(),
         )
-        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+        await ctx.send(embed=embed)
 
-    @honeypot_strip_exception.command(name="remove")
+    @honeypot_cleanup.command(name="window")
     @commands.admin()
-    async def honeypot_strip_exception_remove(self, ctx: commands.Context, role: discord.Role):
-        """Remove a role from the stripping exception list."""
-        async with self.config.guild(ctx.guild).role_exception_ids() as exception_ids:
-            if role.id not in exception_ids:
-                embed = discord.Embed(
-                    title="Not Exception",
-                    description=f"{role.mention} is not on the exception list.",
-                    color=discord.Color.orange(),
-                )
-                await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
-                return
-            exception_ids.remove(role.id)
-
+    async def honeypot_cleanup_window(
+        self,
+        ctx: commands.Context,
+        *,
+        window: commands.TimedeltaConverter(
+            maximum=MAX_BAN_DELETE_WINDOW,
+            allowed_units=["days", "hours", "minutes", "seconds"],
+            default_unit="hours",
+        ),
+    ):
+        """Set how much history Discord deletes when banning (up to 7 days, 0 for none)."""
+        seconds = int(window.total_seconds())
+        await self.config.guild(ctx.guild).ban_delete_seconds.set(seconds)
+        await self._refresh_settings(ctx.guild)
+        if seconds:
+            description = f"Bans will delete the last **{humanize_timedelta(seconds=seconds)}** of messages."
+        else:
+            description = "Bans will not delete any message history."
         embed = discord.Embed(
-            title="Exception Removed",
-            description=f"{role.mention} will now be removed unless exempted otherwise.",
-            color=discord.Color.red(),
+            title="Cleanup Updated",
+            description=description,
+            color=discord.Color.green(),
         )
-        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+        await ctx.send(embed=embed)
 
-    @honeypot_strip_exception.command(name="list")
+    @honeypot_cleanup.command(name="concurrency")
     @commands.admin()
-    async def honeypot_strip_exception_list(self, ctx: commands.Context):
-        """List role stripping exceptions."""
-        await self._send_strip_exception_list(ctx)
+    async def honeypot_cleanup_concurrency(self, ctx: commands.Context, limit: int):
+        """Set how many channels are cleaned up in parallel."""
+        if not 1 <= limit <= MAX_CLEANUP_CONCURRENCY:
+            embed = discord.Embed(
+                title="Invalid Limit",
+                description=f"Choose a value between 1 and {MAX_CLEANUP_CONCURRENCY}.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot or not message.guild:
+        await self.config.guild(ctx.guild).cleanup_concurrency.set(limit)
+        await self._refresh_settings(ctx.guild)
+        embed = discord.Embed(
+            title="Cleanup Updated",
+            description=f"Up to **{limit}** channels will be cleaned up at once.",
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot_cleanup.command(name="budget")
+    @commands.admin()
+    async def honeypot_cleanup_budget(self, ctx: commands.Context, seconds: int):
+        """Set the time limit for a single cleanup sweep (0 disables the limit)."""
+        if not 0 <= seconds <= MAX_CLEANUP_TIME_BUDGET:
+            embed = discord.Embed(
+                title="Invalid Budget",
+                description=f"Choose a value between 0 and {MAX_CLEANUP_TIME_BUDGET} seconds.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
             return
 
-        channel_id = await self.config.guild(message.guild).channel_id()
-        if not channel_id or message.channel.id != channel_id:
+        await self.config.guild(ctx.guild).cleanup_time_budget.set(seconds)
+        await self._refresh_settings(ctx.guild)
+        if seconds:
+            description = f"Cleanup sweeps will stop after **{seconds}s**."
+        else:
+            description = "Cleanup sweeps will run until every channel is checked."
+        embed = discord.Embed(
+            title="Cleanup Updated",
+            description=description,
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot.command(name="raid")
+    @commands.admin()
+    async def honeypot_raid(
+        self, ctx: commands.Context, threshold: int, window: int = 10
+    ):
+        """Batch bans once `threshold` trips happen within `window` seconds (0 disables)."""
+        if threshold < 0 or not 1 <= window <= MAX_RAID_WINDOW:
+            embed = discord.Embed(
+                title="Invalid Raid Settings",
+                description=(
+                    f"Use a threshold of 0 or more and a window between 1 and {MAX_RAID_WINDOW} seconds."
+                ),
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
             return
 
-        exempt = await self._is_exempt(message)
-        if exempt:
-            await self._send_log(
-                message.guild,
-                f"{message.author} was exempt from the honeypot in {message.channel.mention}.",
+        guild_conf = self.config.guild(ctx.guild)
+        await guild_conf.raid_threshold.set(threshold)
+        await guild_conf.raid_window.set(window)
+        await self._refresh_settings(ctx.guild)
+        if threshold:
+            description = (
+                f"When **{threshold}** users trip the honeypot within **{window}s**, "
+                "bans are batched and logged as one summary."
+            )
+        else:
+            description = "Raid mode is disabled; every offender is handled individually."
+        embed = discord.Embed(
+            title="Raid Mode Updated",
+            description=description,
+            color=discord.Color.green() if threshold else discord.Color.greyple(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot.command(name="sweep")
+    @commands.admin()
+    async def honeypot_sweep(self, ctx: commands.Context, mode: str):
+        """Remove copies of a tripped message posted by other accounts (off, delete or punish)."""
+        mode = mode.lower()
+        if mode not in SWEEP_MODES:
+            embed = discord.Embed(
+                title="Invalid Sweep Mode",
+                description=f"Choose one of: {', '.join(SWEEP_MODES)}.",
+                color=discord.Color.red(),
             )
+            await ctx.send(embed=embed)
             return
 
-        cleanup_note = None
-        try:
-            await message.delete()
-        except discord.HTTPException:
-            pass
+        await self.config.guild(ctx.guild).sweep_mode.set(mode)
+        await self._refresh_settings(ctx.guild)
+        if mode == "off":
+            description = "Only the offender's own messages are cleaned up."
+        else:
+            description = (
+                "When someone trips the honeypot, identical messages and attachments posted by "
+                "other accounts in the last hour are deleted"
+            )
+            if mode == "punish":
+                description += " and their authors receive the configured punishment."
+            else:
+                description += "."
+        embed = discord.Embed(
+            title="Sweep Updated",
+            description=description,
+            color=discord.Color.greyple() if mode == "off" else discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot.group(name="federation", invoke_without_command=True)
+    @commands.admin()
+    async def honeypot_federation(self, ctx: commands.Context):
+        """Show this server's federation group and whether it shares trips with it."""
+        settings = await self._get_settings(ctx.guild)
+        group = self._guild_federation.get(ctx.guild.id)
+        if group is None:
+            description = "This server is not in a federation group."
+        else:
+            peers = self._federations[group] - {ctx.guild.id}
+            active = len(peers & self._federation_opt_ins)
+            description = (
+                f"Group: **{group}** ({len(peers)} other servers, {active} opted in)\n"
+                f"Opted in: **{'yes' if settings.federation_opt_in else 'no'}**"
+            )
+        embed = discord.Embed(
+            title="Honeypot Federation",
+            description=description,
+            color=discord.Color.green()
+            if group and settings.federation_opt_in
+            else discord.Color.greyple(),
+        )
+        embed.set_footer(
+            text="Opted-in servers ban anyone banned for tripping the honeypot in another "
+            "opted-in server of the same group, including Ban button escalations."
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot_federation.command(name="optin")
+    @commands.admin()
+    async def honeypot_federation_optin(self, ctx: commands.Context, toggle: bool):
+        """Share trips with this server's federation group and ban users tripped elsewhere."""
+        await self.config.guild(ctx.guild).federation_opt_in.set(toggle)
+        await self._refresh_settings(ctx.guild)
+        group = self._guild_federation.get(ctx.guild.id)
+        if not toggle:
+            description = "This server no longer sends or receives federated bans."
+        elif group is None:
+            description = (
+                "Opted in. Federated bans start once the bot owner adds this server to a group."
+            )
+        else:
+            description = (
+                f"Honeypot bans here are shared with **{group}**, and users banned for tripping "
+                "the honeypot in its other opted-in servers are banned here."
+            )
+        embed = discord.Embed(
+            title="Federation Updated",
+            description=description,
+            color=discord.Color.green() if toggle else discord.Color.greyple(),
+        )
+        await ctx.send(embed=embed)
 
-        deleted_count = await self._purge_recent_messages_guild(message)
-        cleanup_note = self._build_cleanup_note(deleted_count)
+    @honeypot_federation.command(name="create")
+    @commands.is_owner()
+    async def honeypot_federation_create(self, ctx: commands.Context, name: str):
+        """Create an empty federation group."""
+        name = name.lower()
+        if not GROUP_NAME.match(name):
+            embed = discord.Embed(
+                title="Invalid Name",
+                description="Use up to 32 lowercase letters, digits, `-` or `_`.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+        async with self.config.federation_groups() as groups:
+            created = name not in groups
+            if created:
+                groups[name] = []
+            self._load_federations(groups)
 
-        guild_conf = await self.config.guild(message.guild).all()
-        await self._apply_punishment(message, guild_conf, cleanup_note)
+        if created:
+            embed = discord.Embed(
+                title="Federation Created",
+                description=(
+                    f"Add servers with `{ctx.clean_prefix}honeypot federation add {name} <server_id>`."
+                ),
+                color=discord.Color.green(),
+            )
+        else:
+            embed = discord.Embed(
+                title="Already Exists",
+                description=f"There is already a federation group named **{name}**.",
+                color=discord.Color.orange(),
+            )
+        await ctx.send(embed=embed)
 
-    async def _is_exempt(self, message: discord.Message) -> bool:
-        exempt_role_ids = await self.config.guild(message.guild).exempt_roles()
-        if not exempt_role_ids:
-            return False
+    @honeypot_federation.command(name="delete")
+    @commands.is_owner()
+    async def honeypot_federation_delete(self, ctx: commands.Context, name: str):
+        """Delete a federation group; its servers stop sharing trips."""
+        name = name.lower()
+        async with self.config.federation_groups() as groups:
+            removed = groups.pop(name, None)
+            self._load_federations(groups)
 
-        member = message.guild.get_member(message.author.id)
-        if not member:
-            return False
+        if removed is None:
+            embed = discord.Embed(
+                title="Unknown Group",
+                description=f"There is no federation group named **{name}**.",
+                color=discord.Color.orange(),
+            )
+        else:
+            embed = discord.Embed(
+                title="Federation Deleted",
+                description=f"Deleted **{name}** and released its {len(removed)} servers.",
+                color=discord.Color.green(),
+            )
+        await ctx.send(embed=embed)
 
-        return any(role.id in exempt_role_ids for role in getattr(member, "roles", []))
+    @honeypot_federation.command(name="add")
+    @commands.is_owner()
+    async def honeypot_federation_add(self, ctx: commands.Context, name: str, guild_id: int):
+        """Add a server to a federation group; it must still opt in itself."""
+        name = name.lower()
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            embed = discord.Embed(
+                title="Unknown Server",
+                description=f"The bot is not in a server with ID `{guild_id}`.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+        async with self.config.federation_groups() as groups:
+            members = groups.get(name)
+            current = self._guild_federation.get(guild_id)
+            if members is not None and current is None:
+                members.append(guild_id)
+                self._load_federations(groups)
+
+        if members is None:
+            embed = discord.Embed(
+                title="Unknown Group",
+                description=f"There is no federation group named **{name}**.",
+                color=discord.Color.orange(),
+            )
+        elif current is not None:
+            embed = discord.Embed(
+                title="Already Federated",
+                description=f"**{guild.name}** is already in **{current}**; remove it first.",
+                color=discord.Color.orange(),
+            )
+        else:
+            embed = discord.Embed(
+                title="Server Added",
+                description=(
+                    f"**{guild.name}** is now in **{name}**. It shares trips once an admin there "
+                    f"runs `{ctx.clean_prefix}honeypot federation optin true`."
+                ),
+                color=discord.Color.green(),
+            )
+        await ctx.send(embed=embed)
 
-    async def _apply_punishment(
-        self,
-        message: discord.Message,
-        config: dict,
-        cleanup_note: Optional[str] = None,
-    ):
+    @honeypot_federation.command(name="remove")
+    @commands.is_owner()
+    async def honeypot_federation_remove(self, ctx: commands.Context, name: str, guild_id: int):
+        """Remove a server from a federation group."""
+        name = name.lower()
+        async with self.config.federation_groups() as groups:
+            members = groups.get(name)
+            removed = members is not None and guild_id in members
+            if removed:
+                members.remove(guild_id)
+                self._load_federations(groups)
+
+        if removed:
+            embed = discord.Embed(
+                title="Server Removed",
+                description=f"`{guild_id}` no longer shares trips with **{name}**.",
+                color=discord.Color.green(),
+            )
+        else:
+            embed = discord.Embed(
+                title="Not Federated",
+                description=f"`{guild_id}` is not in a federation group named **{name}**.",
+                color=discord.Color.orange(),
+            )
+        await ctx.send(embed=embed)
+
+    @honeypot_federation.command(name="list")
+    @commands.is_owner()
+    async def honeypot_federation_list(self, ctx: commands.Context):
+        """List federation groups and how many of their servers opted in."""
+        if not self._federations:
+            embed = discord.Embed(
+                title="Federation Groups",
+                description="No federation groups exist.",
+                color=discord.Color.greyple(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        lines = [
+            f"**{name}**: {len(members)} servers, "
+            f"{len(members & self._federation_opt_ins)} opted in"
+            for name, members in sorted(self._federations.items())
+        ]
+        embed = discord.Embed(
+            title="Federation Groups",
+            description="\n".join(lines),
+            color=discord.Color.blurple(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot.group(name="overload", invoke_without_command=True)
+    @commands.admin()
+    async def honeypot_overload(self, ctx: commands.Context):
+        """Show when the honeypot drops cleanup and logging to keep up with a flood."""
+        settings = await self._get_settings(ctx.guild)
+        trips = settings.shed_trip_threshold
+        lines = [f"Trips in progress: **{trips}**" if trips else "Trips in progress: **disabled**"]
+        state = self._shedding.get(ctx.guild.id)
+        if state is not None:
+            lines.append(
+                f"\n**Active** for {humanize_timedelta(seconds=max(1, int(state.duration)))}: "
+                f"{state.trips} trips, {state.cleanups} cleanups and {state.logs} logs skipped so far."
+            )
+        embed = discord.Embed(
+            title="Overload Mode",
+            description="\n".join(lines),
+            color=discord.Color.orange() if state else discord.Color.blurple(),
+        )
+        embed.set_footer(
+            text="While overloaded, offenders are only deleted and punished; "
+            "a summary is logged once load drops."
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot_overload.command(name="trips")
+    @commands.admin()
+    async def honeypot_overload_trips(self, ctx: commands.Context, threshold: int):
+        """Enter overload mode once `threshold` trips are in progress at once (0 disables)."""
+        if not 0 <= threshold <= MAX_SHED_TRIP_THRESHOLD:
+            embed = discord.Embed(
+                title="Invalid Threshold",
+                description=f"Use a value between 0 and {MAX_SHED_TRIP_THRESHOLD}.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        await self.config.guild(ctx.guild).shed_trip_threshold.set(threshold)
+        await self._refresh_settings(ctx.guild)
+        if threshold:
+            description = (
+                f"With **{threshold}** trips in progress, cleanup and logging are skipped "
+                "until the backlog clears."
+            )
+        else:
+            description = "The number of trips in progress no longer triggers overload mode."
+        embed = discord.Embed(
+            title="Overload Mode Updated",
+            description=description,
+            color=discord.Color.green() if threshold else discord.Color.greyple(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot.group(name="journal", invoke_without_command=True)
+    @commands.admin()
+    async def honeypot_journal(self, ctx: commands.Context):
+        """Show how much trip history is stored for this server."""
+        await self._journal.flush()
+        count, oldest = await self._journal.count(ctx.guild.id)
+        days = await self.config.journal_retention_days()
+        lines = [f"Entries: **{count}**"]
+        if oldest is not None:
+            lines.append(f"Oldest: <t:{int(oldest)}:R>")
+        lines.append(f"Retention: **{days} days**" if days else "Retention: **forever**")
+        embed = discord.Embed(
+            title="Honeypot Journal",
+            description="\n".join(lines),
+            color=discord.Color.blurple(),
+        )
+        embed.set_footer(text=f"Export with {ctx.clean_prefix}honeypot journal export [days]")
+        await ctx.send(embed=embed)
+
+    @honeypot_journal.command(name="export")
+    @commands.admin()
+    async def honeypot_journal_export(self, ctx: commands.Context, days: int = 30):
+        """Download this server's trips, exemptions and cleanups from the last `days` days."""
+        if days < 1:
+            embed = discord.Embed(
+                title="Invalid Range",
+                description="Export at least one day of history.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        filename = f"honeypot-journal-{ctx.guild.id}.jsonl.gz"
+        async with ctx.typing():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, filename)
+                with gzip.open(path, "wt", encoding="utf-8") as fp:
+                    rows = await self._journal.export(
+                        fp, ctx.guild.id, time.time() - days * 86400, JOURNAL_EXPORT_PAGE_SIZE
+                    )
+                if not rows:
+                    embed = discord.Embed(
+                        title="Nothing to Export",
+                        description=f"No journal entries in the last {days} days.",
+                        color=discord.Color.orange(),
+                    )
+                    await ctx.send(embed=embed)
+                    return
+                if os.path.getsize(path) > ctx.guild.filesize_limit:
+                    embed = discord.Embed(
+                        title="Export Too Large",
+                        description=f"{rows} entries exceed this server's upload limit. Try fewer days.",
+                        color=discord.Color.red(),
+                    )
+                    await ctx.send(embed=embed)
+                    return
+                embed = discord.Embed(
+                    title="Journal Export",
+                    description=f"{rows} entries from the last {days} days, one JSON object per line.",
+                    color=discord.Color.green(),
+                )
+                await ctx.send(embed=embed, file=discord.File(path, filename=filename))
+
+    @honeypot_journal.command(name="retention")
+    @commands.is_owner()
+    async def honeypot_journal_retention(self, ctx: commands.Context, days: int):
+        """Keep journal entries for `days` days across all servers (0 keeps them forever)."""
+        if not 0 <= days <= MAX_JOURNAL_RETENTION_DAYS:
+            embed = discord.Embed(
+                title="Invalid Retention",
+                description=f"Use a value between 0 and {MAX_JOURNAL_RETENTION_DAYS} days.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        await self.config.journal_retention_days.set(days)
+        if days:
+            await self._journal.prune(time.time() - days * 86400)
+            description = f"Journal entries older than **{days} days** are deleted."
+        else:
+            description = "Journal entries are kept forever."
+        embed = discord.Embed(
+            title="Journal Retention Updated",
+            description=description,
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot.group(name="stats", invoke_without_command=True)
+    @commands.is_owner()
+    async def honeypot_stats(self, ctx: commands.Context):
+        """Show per-stage latency and error counts across all servers."""
+        stats = self._stats
+        embed = discord.Embed(title="Honeypot Stats", color=discord.Color.blurple())
+        for stage in STAGES:
+            histogram = stats.histograms[stage]
+            counters = stats.counters[stage]
+            lines = [
+                f"Count: **{histogram.count}**",
+                f"p50 {format_seconds(histogram.quantile(0.5))} · "
+                f"p99 {format_seconds(histogram.quantile(0.99))} · "
+                f"max {format_seconds(histogram.max if histogram.count else None)}",
+            ]
+            if counters.failures or counters.shed:
+                lines.append(
+                    f"Failed {counters.failures} (HTTP {counters.http_errors}, "
+                    f"429 {counters.rate_limited}) · Shed {counters.shed}"
+                )
+            embed.add_field(name=stage.replace("_", " ").title(), value="\n".join(lines))
+
+        since = timedelta(seconds=int(time.time() - stats.started_at))
+        interval = await self.config.metrics_interval()
+        footer = (
+            f"Rate limited responses: {stats.rate_limited} · "
+            f"Since {humanize_timedelta(timedelta=since) or '0 seconds'} ago"
+        )
+        if interval:
+            footer += f" · Exported every {interval}s"
+        embed.set_footer(text=footer)
+        await ctx.send(embed=embed)
+
+    @honeypot_stats.command(name="reset")
+    @commands.is_owner()
+    async def honeypot_stats_reset(self, ctx: commands.Context):
+        """Clear all collected stats."""
+        self._stats.reset()
+        embed = discord.Embed(
+            title="Stats Reset",
+            description="Timings and counters start fresh from now.",
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot_stats.command(name="export")
+    @commands.is_owner()
+    async def honeypot_stats_export(self, ctx: commands.Context, interval: int):
+        """Write stats to a Prometheus text file every `interval` seconds (0 disables)."""
+        if interval and interval < MIN_METRICS_INTERVAL:
+            embed = discord.Embed(
+                title="Invalid Interval",
+                description=f"Use 0 to disable or at least {MIN_METRICS_INTERVAL} seconds.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        await self.config.metrics_interval.set(interval)
+        self._start_metrics_writer(interval)
+        if interval:
+            path = cog_data_path(self) / METRICS_FILE_NAME
+            description = f"Writing `{path}` every **{interval}s**."
+        else:
+            description = "Stats are no longer written to disk."
+        embed = discord.Embed(
+            title="Stats Export Updated",
+            description=description,
+            color=discord.Color.green() if interval else discord.Color.greyple(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot.group(name="trace", invoke_without_command=True)
+    @commands.is_owner()
+    async def honeypot_trace(self, ctx: commands.Context):
+        """Show whether an anonymized trace of trap traffic is being recorded."""
+        trace = self._trace
+        if trace is None:
+            embed = discord.Embed(
+                title="Trace Recorder",
+                description="Not recording.",
+                color=discord.Color.greyple(),
+            )
+            embed.set_footer(text=f"Start with {ctx.clean_prefix}honeypot trace start [max_mb]")
+            await ctx.send(embed=embed)
+            return
+
+        running = timedelta(seconds=int(time.monotonic() - trace.started))
+        lines = [
+            f"File: `{trace.path}`",
+            f"Running for {humanize_timedelta(timedelta=running) or '0 seconds'}",
+            f"Records: **{trace.records}** ({trace.accepted_bytes / 1024 / 1024:.1f} of "
+            f"{trace.max_bytes // 1024 // 1024} MB)",
+        ]
+        if trace.dropped:
+            suffix = " (size limit reached)" if trace.full else ""
+            lines.append(f"Dropped: **{trace.dropped}**{suffix}")
+        embed = discord.Embed(
+            title="Trace Recorder",
+            description="\n".join(lines),
+            color=discord.Color.orange() if trace.full else discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot_trace.command(name="start")
+    @commands.is_owner()
+    async def honeypot_trace_start(
+        self, ctx: commands.Context, max_mb: int = DEFAULT_TRACE_SIZE_MB
+    ):
+        """Record trap messages and the REST calls they cause, up to `max_mb` megabytes."""
+        if not 1 <= max_mb <= MAX_TRACE_SIZE_MB:
+            embed = discord.Embed(
+                title="Invalid Size",
+                description=f"Use a limit between 1 and {MAX_TRACE_SIZE_MB} MB.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+        if self._trace is not None:
+            embed = discord.Embed(
+                title="Already Recording",
+                description=f"Stop the current trace first with `{ctx.clean_prefix}honeypot trace stop`.",
+                color=discord.Color.orange(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        trace = TraceRecorder(
+            cog_data_path(self) / TRACE_DIR_NAME / f"trace-{stamp}.jsonl",
+            max_bytes=max_mb * 1024 * 1024,
+            flush_interval=TRACE_FLUSH_INTERVAL,
+            max_pending=TRACE_MAX_PENDING,
+        )
+        try:
+            await trace.open()
+        except OSError as exc:
+            embed = discord.Embed(
+                title="Trace Failed",
+                description=f"Could not create the trace file: {exc}",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+        self._trace = trace
+        embed = discord.Embed(
+            title="Trace Started",
+            description=(
+                f"Recording to `{trace.path}` until stopped or **{max_mb} MB** is reached. "
+                "IDs are replaced with one-way hashes and message content is never stored."
+            ),
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot_trace.command(name="stop")
+    @commands.is_owner()
+    async def honeypot_trace_stop(self, ctx: commands.Context):
+        """Stop recording and show where the trace was written."""
+        trace = await self._stop_trace()
+        if trace is None:
+            embed = discord.Embed(
+                title="Not Recording",
+                description="There is no trace to stop.",
+                color=discord.Color.orange(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        description = f"Wrote **{trace.records}** records to `{trace.path}`."
+        if trace.dropped:
+            description += f" {trace.dropped} records were dropped."
+        embed = discord.Embed(
+            title="Trace Stopped",
+            description=description,
+            color=discord.Color.green(),
+        )
+        embed.set_footer(text="Replay it with: python -m benchmarks.replay <file>")
+        await ctx.send(embed=embed)
+
+    @honeypot.command(name="profile")
+    @commands.is_owner()
+    async def honeypot_profile(self, ctx: commands.Context, seconds: int):
+        """Sample where this cog spends event loop time for `seconds` seconds."""
+        if not 1 <= seconds <= MAX_PROFILE_SECONDS:
+            embed = discord.Embed(
+                title="Invalid Duration",
+                description=f"Profile for between 1 and {MAX_PROFILE_SECONDS} seconds.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+        if self._profiler is not None:
+            embed = discord.Embed(
+                title="Already Profiling",
+                description="Wait for the current profile to finish.",
+                color=discord.Color.orange(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        profiler = self._profiler = SamplingProfiler(PROFILE_INTERVAL)
+        embed = discord.Embed(
+            title="Profiling",
+            description=f"Sampling the event loop for **{seconds}s**.",
+            color=discord.Color.blurple(),
+        )
+        await ctx.send(embed=embed)
+        try:
+            await profiler.run(seconds)
+        finally:
+            self._profiler = None
+
+        hits = profiler.hits
+        share = hits / profiler.samples if profiler.samples else 0.0
+        embed = discord.Embed(
+            title="Profile Finished",
+            description=(
+                f"{profiler.samples} samples over {profiler.elapsed:.1f}s; the cog was running "
+                f"in **{hits}** of them ({share:.1%})."
+            ),
+            color=discord.Color.green(),
+        )
+        files = [
+            discord.File(
+                io.BytesIO(profiler.top(PROFILE_TOP_N).encode("utf-8")),
+                filename="honeypot-profile-top.txt",
+            )
+        ]
+        if hits:
+            files.append(
+                discord.File(
+                    io.BytesIO(profiler.collapsed().encode("utf-8")),
+                    filename="honeypot-profile.collapsed",
+                )
+            )
+        embed.set_footer(text="The .collapsed file can be fed to flamegraph.pl or speedscope.")
+        await ctx.send(embed=embed, files=files)
+
+    @honeypot.group(name="stripexception", aliases=["stripex"], invoke_without_command=True)
+    @commands.admin()
+    async def honeypot_strip_exception(self, ctx: commands.Context):
+        """Manage exception roles that are kept when stripping roles."""
+        await self._send_strip_exception_list(ctx)
+
+    @honeypot_strip_exception.command(name="add")
+    @commands.admin()
+    async def honeypot_strip_exception_add(self, ctx: commands.Context, role: discord.Role):
+        """Add a role to the role stripping exception list."""
+        async with self.config.guild(ctx.guild).role_exception_ids() as exception_ids:
+            if role.id in exception_ids:
+                embed = discord.Embed(
+                    title="Already Exception",
+                    description=f"{role.mention} is already kept during stripping.",
+                    color=discord.Color.orange(),
+                )
+                await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+                return
+            exception_ids.append(role.id)
+        await self._refresh_settings(ctx.guild)
+
+        embed = discord.Embed(
+            title="Exception Added",
+            description=f"{role.mention} will be kept when roles are stripped.",
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+    @honeypot_strip_exception.command(name="remove")
+    @commands.admin()
+    async def honeypot_strip_exception_remove(self, ctx: commands.Context, role: discord.Role):
+        """Remove a role from the stripping exception list."""
+        async with self.config.guild(ctx.guild).role_exception_ids() as exception_ids:
+            if role.id not in exception_ids:
+                embed = discord.Embed(
+                    title="Not Exception",
+                    description=f"{role.mention} is not on the exception list.",
+                    color=discord.Color.orange(),
+                )
+                await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+                return
+            exception_ids.remove(role.id)
+        await self._refresh_settings(ctx.guild)
+
+        embed = discord.Embed(
+            title="Exception Removed",
+            description=f"{role.mention} will now be removed unless exempted otherwise.",
+            color=discord.Color.red(),
+        )
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+    @honeypot_strip_exception.command(name="list")
+    @commands.admin()
+    async def honeypot_strip_exception_list(self, ctx: commands.Context):
+        """List role stripping exceptions."""
+        await self._send_strip_exception_list(ctx)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        guild = message.guild
+        if guild is None or guild.id not in self._guild_traps or message.author.bot:
+            return
+
+        self._recent_messages.record(
+            guild.id, message.author.id, message.channel.id, message.id
+        )
+        if guild.id in self._sweep_guilds:
+            text, attachments = message_fingerprints(message)
+            if text or attachments:
+                self._content_index.record(
+                    guild.id,
+                    text + attachments,
+                    message.author.id,
+                    message.channel.id,
+                    message.id,
+                )
+        if message.channel.id not in self._trap_channels:
+            return
+        if not self._processed_messages.add(message.id):
+            return
+        self._advance_trap_cursor(guild.id, message.channel.id, message.id)
+
+        settings = await self._get_settings(message.guild)
+        if message.channel.id not in settings.trap_channel_ids:
+            return
+
+        trip_key = (guild.id, message.author.id)
+        resolving = self._resolving.get(trip_key)
+        if resolving is not None:
+            # Another message from this author is still being resolved; share
+            # that lookup so only one of them starts the trip pipeline.
+            member = await asyncio.shield(resolving)
+        if trip_key in self._inflight_trips:
+            if self._trace is not None:
+                self._trace_message(message, settings, RESULT_INFLIGHT)
+            # Someone is already dealing with this member; just remove the spam.
+            try:
+                await self._queue_call(guild.id, PRIORITY_DELETE, message.delete)
+            except discord.HTTPException:
+                pass
+            return
+
+        if resolving is None:
+            resolving = self._resolving[trip_key] = asyncio.ensure_future(
+                self._resolve_member(guild, message.author)
+            )
+            resolving.add_done_callback(lambda _: self._resolving.pop(trip_key, None))
+            member = await asyncio.shield(resolving)
+        exempt_reason = self._exempt_reason(member, settings)
+        if self._trace is not None:
+            self._trace_message(
+                message,
+                settings,
+                RESULT_EXEMPT if exempt_reason else RESULT_TRIP,
+                exempt_reason,
+            )
+        if exempt_reason:
+            self._journal.record(
+                EVENT_EXEMPT,
+                guild.id,
+                user_id=message.author.id,
+                channel_id=message.channel.id,
+                message_id=message.id,
+                outcome=exempt_reason,
+            )
+            await self._send_log(
+                message.guild,
+                f"{message.author} was exempt from the honeypot in {message.channel.mention} "
+                f"({exempt_reason}).",
+            )
+            return
+
+        self._begin_trip(trip_key)
+        queued = False
+        try:
+            queued = await self._handle_trip(message, member, settings)
+        finally:
+            if not queued:
+                self._end_trip(trip_key)
+
+    async def _handle_trip(
+        self,
+        message: discord.Message,
+        member: Optional[discord.Member],
+        settings: GuildSettings,
+    ) -> bool:
+        """Run the trip pipeline; return True if follow-up work still holds the member in flight."""
+        guild = message.guild
+        shed = self._check_overload(guild, settings)
+        with self._stats.time(STAGE_TRIP):
+            try:
+                await self._queue_call(guild.id, PRIORITY_DELETE, message.delete)
+            except discord.HTTPException:
+                pass
+            if guild.id in self._sweep_guilds:
+                self._schedule_sweep(message, settings, shed)
+            if settings.action == "ban":
+                # Kick and role servers review offenders first; their trips
+                # are only shared once a moderator escalates with the Ban button.
+                self._federate_ban(guild, message.author.id, str(message.author))
+
+            if settings.action == "ban" and self._detect_raid(guild, settings):
+                return self._queue_raid_ban(message, member)
+
+            log_entry = await self._apply_punishment(message, member, settings)
+        if shed is not None:
+            shed.add_trip(member or message.author)
+        if member is None or not settings.scans_after(settings.action):
+            return False
+        if shed is not None:
+            shed.cleanups += 1
+            return False
+
+        task = self._spawn(self._cleanup_after_trip(message, member, settings, log_entry))
+        self._cleanup_tasks.add(task)
+        task.add_done_callback(self._cleanup_tasks.discard)
+        return True
+
+    async def _cleanup_after_trip(
+        self,
+        message: discord.Message,
+        member: discord.Member,
+        settings: GuildSettings,
+        log_entry: Optional[LogEntry],
+    ):
+        try:
+            with self._stats.time(STAGE_CLEANUP):
+                cleanup_result = await self._purge_recent_messages_guild(
+                    message, settings, member
+                )
+            self._record_cleanup(member.guild.id, cleanup_result, user_id=member.id)
+            cleanup_note = self._build_cleanup_note(cleanup_result)
+            if cleanup_note and log_entry is not None:
+                await self._append_log_note(log_entry, cleanup_note)
+        finally:
+            self._end_trip((member.guild.id, member.id))
+
+    def _schedule_sweep(
+        self, message: discord.Message, settings: GuildSettings, shed: Optional[ShedState]
+    ):
+        text, attachments = message_fingerprints(message)
+        if not text and not attachments:
+            return
+        if shed is not None:
+            shed.cleanups += 1
+            return
+        task = self._spawn(self._sweep_wave(message, settings, text, attachments))
+        self._cleanup_tasks.add(task)
+        task.add_done_callback(self._cleanup_tasks.discard)
+
+    async def _sweep_wave(
+        self,
+        message: discord.Message,
+        settings: GuildSettings,
+        text: Tuple[int, ...],
+        attachments: Tuple[int, ...],
+    ):
+        guild = message.guild
+        index = self._content_index
+        matches = index.pop_matches(guild.id, text, exclude_author=message.author.id)
+        # Only identical text is strong enough to punish for; accounts that
+        # merely shared an attachment of the same size and name are swept only.
+        punishable = set(matches)
+        for author_id, channels in index.pop_matches(
+            guild.id, attachments, exclude_author=message.author.id
+        ).items():
+            merged = matches.setdefault(author_id, {})
+            for channel_id, message_ids in channels.items():
+                known = merged.setdefault(channel_id, [])
+                known.extend(mid for mid in message_ids if mid not in known)
+        # Never sweep trusted members, e.g. a moderator quoting the scam. Only
+        # cached members are checked unless they are about to be punished.
+        for author_id in list(matches):
+            member = guild.get_member(author_id) or self._member_cache.get(guild.id, author_id)
+            if member is not None and self._exempt_reason(member, settings):
+                del matches[author_id]
+        if not matches or guild.me is None:
+            return
+
+        with self._stats.time(STAGE_CLEANUP):
+            by_channel: Dict[int, List[int]] = {}
+            for channels in matches.values():
+                for channel_id, message_ids in channels.items():
+                    by_channel.setdefault(channel_id, []).extend(message_ids)
+            result = CleanupResult(settings.cleanup_time_budget)
+            jobs = self._indexed_cleanup_jobs(
+                guild, guild.me, by_channel, skip_message_ids=set()
+            )
+            await self._run_cleanup_jobs(
+                guild, jobs, settings, result, timeout=settings.cleanup_time_budget
+            )
+        self._journal.record(
+            EVENT_SWEEP,
+            guild.id,
+            user_id=message.author.id,
+            channel_id=message.channel.id,
+            message_id=message.id,
+            deleted=result.deleted,
+            detail={"authors": len(matches)},
+        )
+
+        channel_mention = message.channel.mention
+        lines = [
+            f"Swept {result.deleted} matching messages from {len(matches)} other accounts "
+            f"after {message.author} tripped the honeypot in {channel_mention}."
+        ]
+        if settings.sweep_mode == "punish":
+            punished, failed = await self._punish_swept(
+                guild, [aid for aid in matches if aid in punishable], settings
+            )
+            action = settings.action
+            for outcome, group in (("ok", punished), ("failed", failed)):
+                for member in group:
+                    self._journal.record(
+                        EVENT_SWEEP, guild.id, user_id=member.id, action=action, outcome=outcome
+                    )
+            if punished:
+                verb = {"ban": "Banned", "kick": "Kicked"}.get(action, "Assigned the punish role to")
+                lines.append(f"{verb} {len(punished)} of them.")
+            if failed:
+                lines.append(
+                    f"Failed to punish {len(failed)} of them. Check permissions and role hierarchy."
+                )
+            attachment_only = len(matches) - len(punishable & set(matches))
+            if attachment_only:
+                lines.append(
+                    f"{attachment_only} matched on an attachment only and were left unpunished."
+                    if attachment_only > 1
+                    else "1 matched on an attachment only and was left unpunished."
+                )
+            offenders = self._format_offender_list(punished, failed)
+        else:
+            shown = [f"<@{author_id}> ({author_id})" for author_id in matches]
+            if len(shown) > OFFENDER_LIST_LIMIT:
+                hidden = len(shown) - OFFENDER_LIST_LIMIT
+                shown = shown[:OFFENDER_LIST_LIMIT] + [f"+{hidden} more"]
+            offenders = "\n".join(shown)
+        if result.channels_unfinished or result.channels_shed:
+            lines.append("Some channels could not be cleaned within the time budget.")
+        await self._send_log(guild, " ".join(lines), offenders=offenders)
+
+    async def _punish_swept(
+        self, guild: discord.Guild, author_ids: List[int], settings: GuildSettings
+    ):
+        # Authors already tripping on their own are punished by that pipeline.
+        author_ids = [aid for aid in author_ids if (guild.id, aid) not in self._inflight_trips]
+        resolved = await asyncio.gather(
+            *(self._resolve_member(guild, discord.Object(id=aid)) for aid in author_ids)
+        )
+        members = [
+            member
+            for member in resolved
+            if member is not None
+            and not member.bot
+            and (guild.id, member.id) not in self._inflight_trips
+            and not self._exempt_reason(member, settings)
+        ]
+        if not members:
+            return [], []
+
+        trip_keys = [(guild.id, member.id) for member in members]
+        for trip_key in trip_keys:
+            self._begin_trip(trip_key)
+        try:
+            if settings.action == "ban":
+                return await self._bulk_ban_members(guild, members, settings)
+            punished, failed = [], []
+            for member in members:
+                if await self._punish_swept_member(member, settings):
+                    punished.append(member)
+                else:
+                    failed.append(member)
+            return punished, failed
+        finally:
+            for trip_key in trip_keys:
+                self._end_trip(trip_key)
+
+    async def _punish_swept_member(self, member: discord.Member, settings: GuildSettings) -> bool:
+        guild = member.guild
+        if settings.action == "kick":
+            factory = functools.partial(guild.kick, member, reason=HONEYPOT_REASON)
+        else:
+            punish_role = guild.get_role(settings.punish_role_id) if settings.punish_role_id else None
+            if punish_role is None:
+                return False
+            if settings.remove_other_roles:
+                keep_ids = {punish_role.id, *settings.role_exception_ids}
+                if not await self._strip_roles_from_member(member, keep_ids):
+                    return False
+            if punish_role in member.roles:
+                return True
+            factory = functools.partial(member.add_roles, punish_role, reason=HONEYPOT_REASON)
+        try:
+            await self._queue_call(guild.id, PRIORITY_PUNISH, factory)
+        except discord.HTTPException:
+            return False
+        return True
+
+    def _begin_trip(self, trip_key: Tuple[int, int]):
+        self._inflight_trips.add(trip_key)
+        guild_id = trip_key[0]
+        self._inflight_per_guild[guild_id] = self._inflight_per_guild.get(guild_id, 0) + 1
+
+    def _end_trip(self, trip_key: Tuple[int, int]):
+        if trip_key not in self._inflight_trips:
+            return
+        self._inflight_trips.discard(trip_key)
+        guild_id = trip_key[0]
+        remaining = self._inflight_per_guild.get(guild_id, 1) - 1
+        if remaining > 0:
+            self._inflight_per_guild[guild_id] = remaining
+        else:
+            self._inflight_per_guild.pop(guild_id, None)
+
+    def _is_overloaded(
+        self, guild: discord.Guild, settings: GuildSettings, *, factor: float = 1.0
+    ) -> bool:
+        return overloaded(
+            self._inflight_per_guild.get(guild.id, 0),
+            settings.shed_trip_threshold,
+            factor=factor,
+        )
+
+    def _check_overload(
+        self, guild: discord.Guild, settings: GuildSettings
+    ) -> Optional[ShedState]:
+        state = self._shedding.get(guild.id)
+        if state is not None or self._unloading:
+            return state
+        if not self._is_overloaded(guild, settings):
+            return None
+        state = self._shedding[guild.id] = ShedState(OFFENDER_LIST_LIMIT)
+        state.watcher = self._spawn(self._watch_overload(guild, state))
+        return state
+
+    async def _watch_overload(self, guild: discord.Guild, state: ShedState):
+        calm_for = 0.0
+        try:
+            # Leave only once load has stayed well below the thresholds for a while,
+            # so the mode does not flap around the trigger point.
+            while calm_for < SHED_COOLDOWN:
+                await asyncio.sleep(SHED_CHECK_INTERVAL)
+                settings = await self._get_settings(guild)
+                if self._is_overloaded(guild, settings, factor=SHED_EXIT_FACTOR):
+                    calm_for = 0.0
+                else:
+                    calm_for += SHED_CHECK_INTERVAL
+        finally:
+            if self._shedding.get(guild.id) is state:
+                del self._shedding[guild.id]
+            await self._send_shed_summary(guild, state)
+
+    async def _send_shed_summary(self, guild: discord.Guild, state: ShedState):
+        duration = humanize_timedelta(seconds=max(1, int(state.duration)))
+        description = (
+            f"Overload mode ended after {duration}. {state.trips} trips were handled with "
+            f"deletion and punishment only; {state.cleanups} message cleanups and "
+            f"{state.logs} log entries were skipped."
+        )
+        lines = [f"{name} ({user_id})" for user_id, name in state.offenders.items()]
+        if state.unlisted:
+            lines.append(f"+{state.unlisted} more")
+        await self._send_log(guild, description, offenders="\n".join(lines) or None)
+
+    def _detect_raid(self, guild: discord.Guild, settings: GuildSettings) -> bool:
+        detector = self._raid_detectors.get(guild.id)
+        if detector is None:
+            detector = self._raid_detectors[guild.id] = RaidDetector()
+        return detector.trip(settings.raid_threshold, settings.raid_window)
+
+    def _queue_raid_ban(self, message: discord.Message, member: Optional[discord.Member]) -> bool:
+        guild = message.guild
+        if not member:
+            return False
+
+        batch = self._raid_batches.get(guild.id)
+        if batch is None:
+            batch = self._raid_batches[guild.id] = RaidBatch()
+            batch.timer = self._spawn(self._flush_raid_batch_later(guild.id))
+        batch.add(member, message)
+
+        if len(batch) >= BULK_BAN_LIMIT:
+            batch.timer.cancel()
+            del self._raid_batches[guild.id]
+            self._spawn(self._process_raid_batch(batch))
+        return True
+
+    async def _flush_raid_batch_later(self, guild_id: int):
+        await asyncio.sleep(RAID_BATCH_DELAY)
+        batch = self._raid_batches.pop(guild_id, None)
+        if batch is not None:
+            await self._process_raid_batch(batch)
+
+    async def _process_raid_batch(self, batch: RaidBatch):
+        members = [member for member, _ in batch.offenders.values()]
+        if not members:
+            return
+        guild = members[0].guild
+        try:
+            await self._ban_raid_batch(guild, batch, members)
+        finally:
+            for member in members:
+                self._end_trip((guild.id, member.id))
+
+    async def _ban_raid_batch(self, guild: discord.Guild, batch: RaidBatch, members: list):
+        settings = await self._get_settings(guild)
+
+        banned, failed = await self._bulk_ban_members(guild, members, settings)
+        for outcome, group in (("ok", banned), ("failed", failed)):
+            for member in group:
+                self._record_trip(
+                    batch.offenders[member.id][1], "ban", outcome, detail={"raid": True}
+                )
+        channels = ", ".join(sorted(batch.channel_mentions))
+        lines = []
+        if banned:
+            lines.append(
+                f"Raid mode: banned {len(banned)} users who tripped the honeypot in {channels}."
+            )
+        if failed:
+            lines.append(
+                f"Failed to ban {len(failed)} users after they tripped the honeypot in {channels}. "
+                "Check permissions and role hierarchy."
+            )
+        log_entry = await self._send_log(
+            guild,
+            " ".join(lines),
+            offenders=self._format_offender_list(banned, failed),
+        )
+        if not settings.scans_after("ban"):
+            return
+        shed = self._shedding.get(guild.id)
+        if shed is not None:
+            for member in members:
+                shed.add_trip(member)
+            shed.cleanups += 1
+            return
+
+        with self._stats.time(STAGE_CLEANUP):
+            cleanup_result = await self._purge_members_guild(
+                guild,
+                members,
+                settings,
+                skip_message_ids={message.id for _, message in batch.offenders.values()},
+            )
+        self._record_cleanup(guild.id, cleanup_result, members=len(members))
+        cleanup_note = self._build_cleanup_note(cleanup_result)
+        if cleanup_note and log_entry is not None:
+            await self._append_log_note(log_entry, cleanup_note)
+
+    async def _bulk_ban_members(
+        self,
+        guild: discord.Guild,
+        members: list,
+        settings: GuildSettings,
+        *,
+        reason: str = HONEYPOT_REASON,
+    ):
+        # Bulk bans also need Manage Server, which servers set up for
+        # single bans usually do not grant; ban one by one instead.
+        bulk_ban = getattr(guild, "bulk_ban", None)
+        me = guild.me
+        if bulk_ban is not None and me is not None and me.guild_permissions.manage_guild:
+            try:
+                ban_result = await self._queue_call(
+                    guild.id,
+                    PRIORITY_PUNISH,
+                    functools.partial(
+                        bulk_ban,
+                        members,
+                        reason=reason,
+                        delete_message_seconds=settings.server_delete_seconds,
+                    ),
+                )
+            except discord.HTTPException:
+                pass
+            else:
+                banned_ids = {user.id for user in ban_result.banned}
+                banned = [member for member in members if member.id in banned_ids]
+                failed = [member for member in members if member.id not in banned_ids]
+                return banned, failed
+
+        banned, failed = [], []
+        for member in members:
+            try:
+                await self._queue_call(
+                    guild.id,
+                    PRIORITY_PUNISH,
+                    functools.partial(
+                        guild.ban,
+                        member,
+                        reason=reason,
+                        delete_message_seconds=settings.server_delete_seconds,
+                    ),
+                )
+            except discord.HTTPException:
+                failed.append(member)
+            else:
+                banned.append(member)
+        return banned, failed
+
+    def _format_offender_list(self, banned: list, failed: list) -> Optional[str]:
+        lines = [f"{member} ({member.id})" for member in banned]
+        lines.extend(f"{member} ({member.id}) - failed" for member in failed)
+        if not lines:
+            return None
+        shown = lines[:OFFENDER_LIST_LIMIT]
+        if len(lines) > OFFENDER_LIST_LIMIT:
+            shown.append(f"+{len(lines) - OFFENDER_LIST_LIMIT} more")
+        return "\n".join(shown)
+
+    def _federate_ban(self, guild: discord.Guild, user_id: int, name: str):
+        if guild.id not in self._federation_opt_ins:
+            return
+        group = self._guild_federation.get(guild.id)
+        if group is None or not self._federated_users.add((group, user_id)):
+            return
+        for peer_id in self._federations[group]:
+            if peer_id == guild.id or peer_id not in self._federation_opt_ins:
+                continue
+            peer = self.bot.get_guild(peer_id)
+            if peer is None:
+                continue
+            batch = self._federated_batches.get(peer_id)
+            if batch is None:
+                batch = self._federated_batches[peer_id] = FederatedBatch(group)
+                batch.timer = self._spawn(self._flush_federated_batch_later(peer_id))
+            batch.add(user_id, name, guild.id, guild.name)
+
+            if len(batch) >= BULK_BAN_LIMIT:
+                batch.timer.cancel()
+                del self._federated_batches[peer_id]
+                self._spawn(self._process_federated_batch(peer, batch))
+
+    async def _flush_federated_batch_later(self, guild_id: int):
+        await asyncio.sleep(FEDERATION_BATCH_DELAY)
+        batch = self._federated_batches.pop(guild_id, None)
+        guild = self.bot.get_guild(guild_id)
+        if batch is not None and guild is not None:
+            await self._process_federated_batch(guild, batch)
+
+    async def _process_federated_batch(self, guild: discord.Guild, batch: FederatedBatch):
+        async with self._federation_slots:
+            await self._ban_federated_batch(guild, batch)
+
+    async def _ban_federated_batch(self, guild: discord.Guild, batch: FederatedBatch):
+        settings = await self._get_settings(guild)
+        if not settings.federation_opt_in:
+            return
+        candidates = [
+            user_id
+            for user_id in batch.users
+            # Users who tripped here as well are already in the local pipeline.
+            if (guild.id, user_id) not in self._inflight_trips
+            and user_id not in settings.exemptions.user_ids
+        ]
+        if settings.exemptions:
+            # Role, permission and age exemptions need the member; users that
+            # cannot be looked up are skipped rather than banned blind.
+            checked = await asyncio.gather(
+                *(self._federated_ban_allowed(guild, user_id, settings) for user_id in candidates)
+            )
+            candidates = [user_id for user_id, allowed in zip(candidates, checked) if allowed]
+        users = [discord.Object(id=user_id) for user_id in candidates]
+        if not users:
+            return
+
+        # Without Manage Server, _bulk_ban_members bans one user at a time.
+        me = guild.me
+        if me is not None and me.guild_permissions.ban_members:
+            banned, failed = await self._bulk_ban_members(
+                guild, users, settings, reason=FEDERATION_REASON
+            )
+        else:
+            banned, failed = [], users
+        for outcome, group in (("ok", banned), ("failed", failed)):
+            for user in group:
+                self._journal.record(
+                    EVENT_FEDERATED_BAN,
+                    guild.id,
+                    user_id=user.id,
+                    action="ban",
+                    outcome=outcome,
+                    detail={"group": batch.group, "source": batch.users[user.id][1]},
+                )
+
+        lines = [f"Federation **{batch.group}**:"]
+        if banned:
+            lines.append(
+                f"banned {len(banned)} users who tripped the honeypot in another server."
+            )
+        if failed:
+            lines.append(
+                f"Failed to ban {len(failed)} users who tripped the honeypot in another server. "
+                "Check permissions and role hierarchy."
+            )
+        offenders = [self._federated_offender(batch, user, "") for user in banned]
+        offenders.extend(self._federated_offender(batch, user, " - failed") for user in failed)
+        shown = offenders[:OFFENDER_LIST_LIMIT]
+        if len(offenders) > OFFENDER_LIST_LIMIT:
+            shown.append(f"+{len(offenders) - OFFENDER_LIST_LIMIT} more")
+        await self._send_log(guild, " ".join(lines), offenders="\n".join(shown))
+
+    async def _federated_ban_allowed(
+        self, guild: discord.Guild, user_id: int, settings: GuildSettings
+    ) -> bool:
+        try:
+            member = await self._lookup_member(guild, user_id, PRIORITY_CLEANUP)
+        except discord.NotFound:
+            # Not in this server; nothing to be exempt from.
+            return True
+        except discord.HTTPException:
+            return False
+        return self._exempt_reason(member, settings) is None
+
+    @staticmethod
+    def _federated_offender(batch: FederatedBatch, user: discord.Object, suffix: str) -> str:
+        name, _, source_name = batch.users[user.id]
+        return f"{name} ({user.id}) from {source_name}{suffix}"
+
+    def _record_trip(
+        self, message: discord.Message, action: str, outcome: str, *, detail: dict = None
+    ):
+        self._journal.record(
+            EVENT_TRIP,
+            message.guild.id,
+            user_id=message.author.id,
+            channel_id=message.channel.id,
+            message_id=message.id,
+            action=action,
+            outcome=outcome,
+            detail=detail,
+        )
+
+    def _record_cleanup(
+        self, guild_id: int, result: CleanupResult, *, user_id: int = None, members: int = None
+    ):
+        detail = {
+            key: value
+            for key, value in (
+                ("members", members),
+                ("unfinished", result.channels_unfinished),
+                ("shed", result.channels_shed),
+                ("idle", result.channels_idle),
+            )
+            if value
+        }
+        self._journal.record(
+            EVENT_CLEANUP, guild_id, user_id=user_id, deleted=result.deleted, detail=detail
+        )
+
+    def _exempt_reason(
+        self, member: Optional[discord.Member], settings: GuildSettings
+    ) -> Optional[str]:
+        exemptions = settings.exemptions
+        if not exemptions or member is None:
+            return None
+        return exemptions(member)
+
+    async def _resolve_member(
+        self, guild: discord.Guild, user: discord.abc.User
+    ) -> Optional[discord.Member]:
+        """Find ``user`` as a member of ``guild`` without needing the member cache."""
+        if isinstance(user, discord.Member) and user.guild.id == guild.id:
+            # Message authors arrive with their member data attached.
+            return user
+        try:
+            return await self._lookup_member(guild, user.id)
+        except discord.HTTPException:
+            return None
+
+    async def _lookup_member(
+        self, guild: discord.Guild, user_id: int, priority: int = PRIORITY_PUNISH
+    ) -> discord.Member:
+        """Cached member, else fetched; raises ``discord.NotFound`` for non-members."""
+        member = guild.get_member(user_id) or self._member_cache.get(guild.id, user_id)
+        if member is not None:
+            return member
+        member = await self._queue_call(
+            guild.id, priority, functools.partial(guild.fetch_member, user_id)
+        )
+        self._member_cache.put(member)
+        return member
+
+    async def _apply_punishment(
+        self,
+        message: discord.Message,
+        member: Optional[discord.Member],
+        settings: GuildSettings,
+    ) -> Optional[LogEntry]:
         guild = message.guild
-        member = guild.get_member(message.author.id)
+        action = settings.action
         if not member:
-            return
+            self._record_trip(message, action, "left")
+            return None
 
-        action = (config.get("action") or "ban").lower()
         channel_mention = message.channel.mention
-        deleted_message = self._extract_deleted_message_details(message)
+        if guild.id in self._shedding:
+            # The log entry will be dropped anyway.
+            deleted_message = None
+        else:
+            deleted_message = self._extract_deleted_message_details(message)
 
         if action == "kick":
             try:
-                await guild.kick(member, reason=HONEYPOT_REASON)
-                view = self._build_ban_review_view(guild, member)
-                description = self._append_cleanup_note(
-                    f"{member} was kicked for tripping the honeypot in {channel_mention}. Review and ban if necessary.",
-                    cleanup_note,
+                await self._queue_call(
+                    guild.id,
+                    PRIORITY_PUNISH,
+                    functools.partial(guild.kick, member, reason=HONEYPOT_REASON),
                 )
-                await self._send_log(
+                self._record_trip(message, action, "ok")
+                description = f"{member} was kicked for tripping the honeypot in {channel_mention}. Review and ban if necessary."
+                return await self._send_log(
                     guild,
                     description,
                     target=member,
-                    view=view,
+                    review=True,
                     deleted_message=deleted_message,
                 )
             except discord.HTTPException:
-                description = self._append_cleanup_note(
-                    f"Failed to kick {member} after they tripped the honeypot in {channel_mention}. Check permissions and role hierarchy.",
-                    cleanup_note,
-                )
-                await self._send_log(
+                self._record_trip(message, action, "failed")
+                description = f"Failed to kick {member} after they tripped the honeypot in {channel_mention}. Check permissions and role hierarchy."
+                return await self._send_log(
                     guild,
                     description,
                     target=member,
                     deleted_message=deleted_message,
                 )
-            return
 
         if action == "role":
-            await self._apply_role_punishment(
-                member, config, channel_mention, deleted_message, cleanup_note
+            return await self._apply_role_punishment(
+                member, settings, message, deleted_message
             )
-            return
 
         # Default to ban
         try:
-            await guild.ban(
-                member,
-                reason=HONEYPOT_REASON,
-                delete_message_days=1,
-            )
-            description = self._append_cleanup_note(
-                f"{member} was banned for tripping the honeypot in {channel_mention}.",
-                cleanup_note,
+            await self._queue_call(
+                guild.id,
+                PRIORITY_PUNISH,
+                functools.partial(
+                    guild.ban,
+                    member,
+                    reason=HONEYPOT_REASON,
+                    delete_message_seconds=settings.server_delete_seconds,
+                ),
             )
-            await self._send_log(
+            self._record_trip(message, action, "ok")
+            description = f"{member} was banned for tripping the honeypot in {channel_mention}."
+            return await self._send_log(
                 guild,
                 description,
                 target=member,
                 deleted_message=deleted_message,
             )
         except discord.HTTPException:
-            description = self._append_cleanup_note(
-                f"Failed to ban {member} after they tripped the honeypot in {channel_mention}. Check permissions and role hierarchy.",
-                cleanup_note,
-            )
-            await self._send_log(
+            self._record_trip(message, action, "failed")
+            description = f"Failed to ban {member} after they tripped the honeypot in {channel_mention}. Check permissions and role hierarchy."
+            return await self._send_log(
                 guild,
                 description,
                 target=member,
@@ -440,63 +2535,62 @@ class Honeypot(commands.Cog):
     async def _apply_role_punishment(
         self,
         member: discord.Member,
-        config: dict,
-        channel_mention: str,
+        settings: GuildSettings,
+        message: discord.Message,
         deleted_message: str = None,
-        cleanup_note: Optional[str] = None,
-    ):
+    ) -> Optional[LogEntry]:
         guild = member.guild
-        punish_role_id = config.get("punish_role_id")
+        channel_mention = message.channel.mention
+        punish_role_id = settings.punish_role_id
         punish_role = guild.get_role(punish_role_id) if punish_role_id else None
 
         if not punish_role:
-            description = self._append_cleanup_note(
-                f"{member} tripped the honeypot in {channel_mention}, but no punish role is configured.",
-                cleanup_note,
-            )
-            await self._send_log(
+            self._record_trip(message, "role", "no_role")
+            description = f"{member} tripped the honeypot in {channel_mention}, but no punish role is configured."
+            return await self._send_log(
                 guild,
                 description,
                 target=member,
                 deleted_message=deleted_message,
             )
-            return
 
-        remove_roles = config.get("remove_other_roles", False)
-        exceptions = set(config.get("role_exception_ids", []))
+        exceptions = set(settings.role_exception_ids)
         exceptions.add(punish_role.id)
 
-        if remove_roles:
-            stripped = await self._strip_roles_from_member(
-                member, exceptions, channel_mention, cleanup_note
-            )
+        if settings.remove_other_roles:
+            stripped = await self._strip_roles_from_member(member, exceptions)
             if not stripped:
-                return
+                self._record_trip(message, "role", "strip_failed")
+                description = f"Failed to strip roles from {member} after they tripped the honeypot in {channel_mention}. Check permissions and role hierarchy."
+                return await self._send_log(
+                    guild,
+                    description,
+                    target=member,
+                )
 
         try:
             if punish_role not in member.roles:
-                await member.add_roles(punish_role, reason=HONEYPOT_REASON)
-            view = self._build_ban_review_view(guild, member)
-            description = self._append_cleanup_note(
-                (
-                    f"{member} was assigned {punish_role.mention} for tripping the honeypot in {channel_mention}. "
-                    "Review and ban if necessary."
-                ),
-                cleanup_note,
+                await self._queue_call(
+                    guild.id,
+                    PRIORITY_PUNISH,
+                    functools.partial(member.add_roles, punish_role, reason=HONEYPOT_REASON),
+                )
+            self._record_trip(message, "role", "ok")
+            description = (
+                f"{member} was assigned {punish_role.mention} for tripping the honeypot in {channel_mention}. "
+                "Review and ban if necessary."
             )
-            await self._send_log(
+            return await self._send_log(
                 guild,
                 description,
                 target=member,
-                view=view,
+                review=True,
                 deleted_message=deleted_message,
             )
         except discord.HTTPException:
-            description = self._append_cleanup_note(
-                f"Failed to assign {punish_role.name} to {member} after they tripped the honeypot in {channel_mention}. Check permissions and role hierarchy.",
-                cleanup_note,
-            )
-            await self._send_log(
+            self._record_trip(message, "role", "failed")
+            description = f"Failed to assign {punish_role.name} to {member} after they tripped the honeypot in {channel_mention}. Check permissions and role hierarchy."
+            return await self._send_log(
                 guild,
                 description,
                 target=member,
@@ -507,8 +2601,6 @@ class Honeypot(commands.Cog):
         self,
         member: discord.Member,
         keep_ids: set,
-        channel_mention: str,
-        cleanup_note: Optional[str] = None,
     ) -> bool:
         guild = member.guild
         default_role = guild.default_role
@@ -522,61 +2614,316 @@ class Honeypot(commands.Cog):
             return True
 
         try:
-            await member.remove_roles(*roles_to_remove, reason=HONEYPOT_REASON)
+            await self._queue_call(
+                guild.id,
+                PRIORITY_PUNISH,
+                functools.partial(
+                    member.remove_roles, *roles_to_remove, reason=HONEYPOT_REASON
+                ),
+            )
             return True
         except discord.HTTPException:
-            description = self._append_cleanup_note(
-                f"Failed to strip roles from {member} after they tripped the honeypot in {channel_mention}. Check permissions and role hierarchy.",
-                cleanup_note,
-            )
-            await self._send_log(
-                guild,
-                description,
-                target=member,
-            )
             return False
 
     async def _purge_recent_messages_guild(
         self,
         trigger_message: discord.Message,
-    ) -> int:
+        settings: GuildSettings,
+        member: Optional[discord.Member] = None,
+    ) -> CleanupResult:
         guild = trigger_message.guild
         if not guild:
-            return 0
+            return CleanupResult(settings.cleanup_time_budget)
 
+        if member is None:
+            member = await self._resolve_member(guild, trigger_message.author)
+        members = [member] if member else []
+        return await self._purge_members_guild(
+            guild, members, settings, skip_message_ids={trigger_message.id}
+        )
+
+    async def _purge_members_guild(
+        self,
+        guild: discord.Guild,
+        members: list,
+        settings: GuildSettings,
+        *,
+        skip_message_ids: Set[int],
+    ) -> CleanupResult:
+        result = CleanupResult(settings.cleanup_time_budget)
         bot_member = guild.me
-        member = guild.get_member(trigger_message.author.id)
-        if not bot_member or not member:
-            return 0
+        if not bot_member or not members:
+            return result
+
+        window = CLEANUP_WINDOW.total_seconds()
+        indexed: Dict[int, List[int]] = {}
+        unindexed = []
+        for member in members:
+            found = self._recent_messages.lookup(guild.id, member.id, window)
+            if found is None:
+                unindexed.append(member)
+                continue
+            for channel_id, message_ids in found.items():
+                indexed.setdefault(channel_id, []).extend(message_ids)
+            self._recent_messages.discard(guild.id, member.id)
+
+        started = time.monotonic()
+        jobs = self._indexed_cleanup_jobs(
+            guild, bot_member, indexed, skip_message_ids=skip_message_ids
+        )
+        if unindexed:
+            channels = self._purge_eligible_channels(guild)
+            channels.extend(await self._fetch_purgeable_threads(guild, settings))
+            jobs.extend(
+                self._scan_cleanup_jobs(
+                    channels, unindexed, result, skip_message_ids=skip_message_ids
+                )
+            )
+
+        timeout = settings.cleanup_time_budget
+        if timeout is not None:
+            timeout = max(0.0, timeout - (time.monotonic() - started))
+        await self._run_cleanup_jobs(guild, jobs, settings, result, timeout=timeout)
+        return result
+
+    async def _fetch_purgeable_threads(
+        self, guild: discord.Guild, settings: GuildSettings
+    ) -> list:
+        # One guild-wide request covers threads and forum posts under every
+        # parent, instead of one lookup per channel.
+        try:
+            threads = await asyncio.wait_for(
+                self._queue_call(
+                    guild.id, PRIORITY_CLEANUP, guild.active_threads, droppable=True
+                ),
+                timeout=settings.cleanup_time_budget,
+            )
+        except (asyncio.TimeoutError, WorkDropped, discord.HTTPException):
+            return []
+        return [thread for thread in threads if self._can_purge(thread)]
 
-        cutoff = discord.utils.utcnow() - timedelta(hours=1)
-        total_deleted = 0
+    def _indexed_cleanup_jobs(
+        self,
+        guild: discord.Guild,
+        bot_member: discord.Member,
+        indexed: Dict[int, List[int]],
+        *,
+        skip_message_ids: Set[int],
+    ) -> list:
+        jobs = []
+        for channel_id, message_ids in indexed.items():
+            message_ids = [
+                mid for mid in dict.fromkeys(message_ids) if mid not in skip_message_ids
+            ]
+            if not message_ids:
+                continue
 
-        for channel in guild.text_channels:
+            channel = guild.get_channel_or_thread(channel_id)
+            if channel is None:
+                continue
             perms = channel.permissions_for(bot_member)
-            if not (perms.manage_messages and perms.read_message_history):
+            if not perms.manage_messages:
+                continue
+
+            jobs.append(functools.partial(self._delete_messages_by_id, channel, message_ids))
+        return jobs
+
+    def _scan_cleanup_jobs(
+        self,
+        channels: list,
+        members: list,
+        result: CleanupResult,
+        *,
+        skip_message_ids: Set[int],
+    ) -> list:
+        cutoff = discord.utils.utcnow() - CLEANUP_WINDOW
+        # Snowflakes encode their creation time, so a channel whose newest
+        # message predates the cutoff has nothing to scan.
+        cutoff_id = discord.utils.time_snowflake(cutoff)
+        jobs = []
+
+        for channel in channels:
+            last_message_id = channel.last_message_id
+            if last_message_id is None or last_message_id < cutoff_id:
+                result.channels_idle += 1
                 continue
 
-            member_perms = channel.permissions_for(member)
-            if not (member_perms.view_channel and member_perms.send_messages):
+            author_ids = {
+                member.id for member in members if self._can_post(channel, member)
+            }
+            if not author_ids:
                 continue
 
-            deleted = await self._purge_channel_messages(
-                channel,
-                author_id=member.id,
-                skip_message_id=trigger_message.id,
-                cutoff=cutoff,
+            jobs.append(
+                functools.partial(
+                    self._purge_channel_messages,
+                    channel,
+                    author_ids=author_ids,
+                    skip_message_ids=skip_message_ids,
+                    cutoff=cutoff,
+                )
             )
-            total_deleted += deleted
+        return jobs
+
+    def _purge_eligible_channels(self, guild: discord.Guild) -> list:
+        channel_ids = self._eligible_channels.get(guild.id)
+        if channel_ids is None:
+            # Voice and stage channels have their own text chat.
+            candidates = itertools.chain(
+                guild.text_channels, guild.voice_channels, guild.stage_channels
+            )
+            channel_ids = self._eligible_channels[guild.id] = {
+                channel.id for channel in candidates if self._can_purge(channel)
+            }
+        channels = [guild.get_channel(channel_id) for channel_id in channel_ids]
+        return [channel for channel in channels if channel]
+
+    def _can_purge(self, channel) -> bool:
+        bot_member = channel.guild.me
+        if bot_member is None:
+            return False
+        perms = channel.permissions_for(bot_member)
+        return perms.manage_messages and perms.read_message_history
+
+    def _can_post(self, channel, member: discord.Member) -> bool:
+        perms = channel.permissions_for(member)
+        if not perms.view_channel:
+            return False
+        if isinstance(channel, discord.Thread):
+            return perms.send_messages_in_threads
+        return perms.send_messages
+
+    def _refresh_eligible_channel(self, channel):
+        channel_ids = self._eligible_channels.get(channel.guild.id)
+        if channel_ids is None:
+            return
+        if isinstance(channel, discord.CategoryChannel):
+            # Synced children inherit the category's overwrites.
+            self._eligible_channels.pop(channel.guild.id, None)
+        elif isinstance(channel, PURGEABLE_CHANNEL_TYPES) and self._can_purge(channel):
+            channel_ids.add(channel.id)
+        else:
+            channel_ids.discard(channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        self._refresh_eligible_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(
+        self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel
+    ):
+        self._refresh_eligible_channel(after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        channel_ids = self._eligible_channels.get(channel.guild.id)
+        if channel_ids is not None:
+            channel_ids.discard(channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        bot_member = after.guild.me
+        if bot_member is not None and after in bot_member.roles:
+            self._eligible_channels.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self._eligible_channels.pop(role.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        self._member_cache.replace(after)
+        if after.id == self.bot.user.id and before.roles != after.roles:
+            self._eligible_channels.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        self._member_cache.discard(payload.guild_id, payload.user.id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if payload.guild_id in self._guild_traps:
+            self._deleted_messages.add(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        if payload.guild_id in self._guild_traps:
+            for message_id in payload.message_ids:
+                self._deleted_messages.add(message_id)
+
+    async def _run_cleanup_jobs(
+        self,
+        guild: discord.Guild,
+        jobs: list,
+        settings: GuildSettings,
+        result: CleanupResult,
+        *,
+        timeout: Optional[float] = None,
+    ):
+        if not jobs:
+            return
+
+        # Values saved before the limit was tied to the queue are clamped.
+        semaphore = asyncio.Semaphore(min(settings.cleanup_concurrency, MAX_CLEANUP_CONCURRENCY))
+
+        async def run(job) -> int:
+            async with semaphore:
+                return await self._queue_call(guild.id, PRIORITY_CLEANUP, job, droppable=True)
 
-        return total_deleted
+        tasks = [asyncio.ensure_future(run(job)) for job in jobs]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for task in done:
+            if task.cancelled():
+                result.channels_unfinished += 1
+                continue
+            exc = task.exception()
+            if isinstance(exc, WorkDropped):
+                result.channels_shed += 1
+                continue
+            if exc is not None:
+                result.channels_unfinished += 1
+                continue
+            result.deleted += task.result()
+        result.channels_unfinished += len(pending)
+
+    async def _delete_messages_by_id(self, channel, message_ids: List[int]) -> int:
+        # Bulk deletes silently skip unknown IDs, so the response cannot tell
+        # how many were removed; leave out the ones known to be gone already.
+        message_ids = [mid for mid in message_ids if mid not in self._deleted_messages]
+        deleted = 0
+        for start in range(0, len(message_ids), BULK_DELETE_LIMIT):
+            chunk = [
+                discord.Object(id=mid)
+                for mid in message_ids[start : start + BULK_DELETE_LIMIT]
+            ]
+            try:
+                await channel.delete_messages(chunk, reason=HONEYPOT_REASON)
+            except discord.NotFound:
+                continue
+            except (discord.Forbidden, discord.HTTPException) as exc:
+                self._stats.record_error(STAGE_CLEANUP_CALL, exc)
+                break
+            deleted += len(chunk)
+        return deleted
 
     async def _purge_channel_messages(
         self,
         channel: discord.TextChannel,
         *,
-        author_id: int,
-        skip_message_id: int,
+        author_ids: Set[int],
+        skip_message_ids: Set[int],
         cutoff,
     ) -> int:
         purge = getattr(channel, "purge", None)
@@ -584,7 +2931,7 @@ class Honeypot(commands.Cog):
             return 0
 
         def should_delete(msg: discord.Message) -> bool:
-            if msg.author.id != author_id or msg.id == skip_message_id:
+            if msg.author.id not in author_ids or msg.id in skip_message_ids:
                 return False
             return True
 
@@ -596,17 +2943,45 @@ class Honeypot(commands.Cog):
                 bulk=True,
                 reason=HONEYPOT_REASON,
             )
-        except (discord.Forbidden, discord.HTTPException):
+        except (discord.Forbidden, discord.HTTPException) as exc:
+            self._stats.record_error(STAGE_CLEANUP_CALL, exc)
             return 0
 
         return len(deleted)
 
-    def _build_cleanup_note(self, deleted_count: int) -> Optional[str]:
-        if not deleted_count:
-            return None
+    def _build_cleanup_note(self, result: CleanupResult) -> Optional[str]:
+        notes = []
+        deleted_count = result.deleted
         if deleted_count == 1:
-            return "Removed 1 other message from the last hour."
-        return f"Removed {deleted_count} other messages from the last hour across accessible channels."
+            notes.append("Removed 1 other message from the last hour.")
+        elif deleted_count:
+            notes.append(
+                f"Removed {deleted_count} other messages from the last hour across accessible channels."
+            )
+
+        unfinished = result.channels_unfinished
+        if unfinished:
+            channel_text = "channel was" if unfinished == 1 else "channels were"
+            if result.time_budget:
+                notes.append(
+                    f"Cleanup stopped after {result.time_budget:g}s; {unfinished} {channel_text} not fully checked."
+                )
+            else:
+                notes.append(f"Cleanup failed; {unfinished} {channel_text} not fully checked.")
+
+        shed = result.channels_shed
+        if shed:
+            channel_text = "channel was" if shed == 1 else "channels were"
+            notes.append(
+                f"{shed} {channel_text} skipped because the moderation queue was busy."
+            )
+
+        idle = result.channels_idle
+        if idle:
+            channel_text = "channel" if idle == 1 else "channels"
+            notes.append(f"Skipped {idle} idle {channel_text} without scanning.")
+
+        return " ".join(notes) if notes else None
 
     def _append_cleanup_note(
         self, description: str, cleanup_note: Optional[str]
@@ -635,9 +3010,58 @@ class Honeypot(commands.Cog):
         return "\n".join(parts) if parts else None
 
     def _build_ban_review_view(
-        self, guild: discord.Guild, target: discord.abc.User
-    ) -> BanReviewView:
-        return BanReviewView(self, guild.id, target.id, str(target))
+        self, guild_id: int, targets: List[Tuple[int, str]]
+    ) -> Optional[discord.ui.View]:
+        if not targets:
+            return None
+        view = discord.ui.View(timeout=None)
+        if len(targets) == 1:
+            view.add_item(BanReviewButton(guild_id, targets[0][0]))
+        else:
+            for target_id, target_name in targets:
+                view.add_item(
+                    BanReviewButton(guild_id, target_id, label=f"Ban {target_name}"[:80])
+                )
+        # Clicks are routed to the registered BanReviewButton class; a stopped
+        # view is never stored by the client, so nothing is kept per message.
+        view.stop()
+        return view
+
+    def _resolve_trap_channels(self, guild: discord.Guild, channel_ids) -> list:
+        channels = [guild.get_channel(cid) for cid in sorted(channel_ids)]
+        return [c for c in channels if c]
+
+    async def _send_trap_list(self, ctx: commands.Context):
+        settings = await self._get_settings(ctx.guild)
+        channels = self._resolve_trap_channels(ctx.guild, settings.trap_channel_ids)
+        prefix = ctx.clean_prefix
+
+        if not channels:
+            embed = discord.Embed(
+                title="Trap Channels",
+                description="No trap channels are configured.",
+                color=discord.Color.blue(),
+            )
+            embed.add_field(
+                name="Add Trap",
+                value=f"`{prefix}honeypot trap add <channel>`",
+                inline=False,
+            )
+            await ctx.send(embed=embed)
+            return
+
+        channel_list = "\n".join(f"- {channel.mention}" for channel in channels)
+        embed = discord.Embed(
+            title="Trap Channels",
+            description=f"Anyone who messages in these channels will be punished:\n\n{channel_list}",
+            color=discord.Color.blue(),
+        )
+        embed.add_field(
+            name="Manage",
+            value=f"`{prefix}honeypot trap add <channel>`\n`{prefix}honeypot trap remove <channel>`",
+            inline=False,
+        )
+        await ctx.send(embed=embed)
 
     async def _send_strip_exception_list(self, ctx: commands.Context):
         exception_ids = await self.config.guild(ctx.guild).role_exception_ids()
@@ -686,54 +3110,69 @@ class Honeypot(commands.Cog):
         await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
 
     async def _send_exempt_list(self, ctx: commands.Context):
-        exempt_ids = await self.config.guild(ctx.guild).exempt_roles()
+        data = await self.config.guild(ctx.guild).all()
         prefix = ctx.clean_prefix
+        exempt_ids = data.get("exempt_roles", [])
+        user_ids = data.get("exempt_user_ids", [])
+        permissions = discord.Permissions(data.get("exempt_permissions", 0))
+        account_age = data.get("exempt_account_age", 0)
+        join_age = data.get("exempt_join_age", 0)
+
+        manage_text = (
+            f"`{prefix}honeypot exempt add/remove <role>`\n"
+            f"`{prefix}honeypot exempt user add/remove <user>`\n"
+            f"`{prefix}honeypot exempt permission add/remove <permission>`\n"
+            f"`{prefix}honeypot exempt accountage <duration>`\n"
+            f"`{prefix}honeypot exempt joinage <duration>`"
+        )
 
-        if not exempt_ids:
+        if not (exempt_ids or user_ids or permissions.value or account_age or join_age):
             embed = discord.Embed(
-                title="Exempt Roles",
-                description="No roles are exempt from the honeypot.\n\nAll users who message in the trap channel will be punished.",
+                title="Exemptions",
+                description="No one is exempt from the honeypot.\n\nAll users who message in the trap channel will be punished.",
                 color=discord.Color.blue(),
             )
-            embed.add_field(
-                name="Add Exemptions",
-                value=f"`{prefix}honeypot exempt add <role>`",
-                inline=False,
-            )
-            await ctx.send(embed=embed)
-            return
-
-        roles = []
-        for rid in exempt_ids:
-            role = ctx.guild.get_role(rid)
-            if role:
-                roles.append(role)
-
-        if not roles:
-            embed = discord.Embed(
-                title="Exempt Roles",
-                description="Previously configured roles no longer exist.\n\nYou may want to reconfigure exemptions.",
-                color=discord.Color.orange(),
-            )
-            embed.add_field(
-                name="Add Exemptions",
-                value=f"`{prefix}honeypot exempt add <role>`",
-                inline=False,
-            )
+            embed.add_field(name="Add Exemptions", value=manage_text, inline=False)
             await ctx.send(embed=embed)
             return
 
-        role_list = "\n".join(f"- {role.mention}" for role in roles)
         embed = discord.Embed(
-            title="Exempt Roles",
-            description=f"These roles can message in the trap channel without being punished:\n\n{role_list}",
+            title="Exemptions",
+            description="Members matching any of these rules can message in the trap channel without being punished.",
             color=discord.Color.blue(),
         )
-        embed.add_field(
-            name="Manage",
-            value=f"`{prefix}honeypot exempt add <role>`\n`{prefix}honeypot exempt remove <role>`",
-            inline=False,
-        )
+        if exempt_ids:
+            roles = [ctx.guild.get_role(rid) for rid in exempt_ids]
+            roles = [role for role in roles if role]
+            embed.add_field(
+                name="Roles",
+                value="\n".join(f"- {role.mention}" for role in roles)
+                or "*Previously configured roles no longer exist.*",
+                inline=False,
+            )
+        if user_ids:
+            shown = "\n".join(f"- <@{uid}> ({uid})" for uid in user_ids[:15])
+            if len(user_ids) > 15:
+                shown += f"\n*+{len(user_ids) - 15} more*"
+            embed.add_field(name="Users", value=shown, inline=False)
+        if permissions.value:
+            names = ", ".join(
+                f"`{name}`" for name, enabled in permissions if enabled
+            )
+            embed.add_field(name="Any Of These Permissions", value=names, inline=False)
+        if account_age:
+            embed.add_field(
+                name="Account Age",
+                value=f"Older than {humanize_timedelta(seconds=account_age)}",
+                inline=True,
+            )
+        if join_age:
+            embed.add_field(
+                name="Membership Age",
+                value=f"Joined more than {humanize_timedelta(seconds=join_age)} ago",
+                inline=True,
+            )
+        embed.add_field(name="Manage", value=manage_text, inline=False)
         await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
 
     @honeypot.group(name="exempt", aliases=["ex"], invoke_without_command=True)
@@ -756,6 +3195,7 @@ class Honeypot(commands.Cog):
                 await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
                 return
             exempt_ids.append(role.id)
+        await self._refresh_settings(ctx.guild)
 
         embed = discord.Embed(
             title="Role Exempted",
@@ -778,6 +3218,7 @@ class Honeypot(commands.Cog):
                 await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
                 return
             exempt_ids.remove(role.id)
+        await self._refresh_settings(ctx.guild)
 
         embed = discord.Embed(
             title="Role Removed",
@@ -789,25 +3230,190 @@ class Honeypot(commands.Cog):
     @honeypot_exempt.command(name="list")
     @commands.admin()
     async def honeypot_exempt_list(self, ctx: commands.Context):
-        """List honeypot exempt roles."""
+        """List every honeypot exemption rule."""
+        await self._send_exempt_list(ctx)
+
+    @honeypot_exempt.group(name="user", aliases=["users"], invoke_without_command=True)
+    @commands.admin()
+    async def honeypot_exempt_user(self, ctx: commands.Context):
+        """Manage users who are always exempt from the honeypot."""
+        await self._send_exempt_list(ctx)
+
+    @honeypot_exempt_user.command(name="add")
+    @commands.admin()
+    async def honeypot_exempt_user_add(self, ctx: commands.Context, user: discord.User):
+        """Exempt a specific user from the honeypot."""
+        async with self.config.guild(ctx.guild).exempt_user_ids() as user_ids:
+            if user.id in user_ids:
+                embed = discord.Embed(
+                    title="Already Exempt",
+                    description=f"{user.mention} is already on the exemption list.",
+                    color=discord.Color.orange(),
+                )
+                await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+                return
+            user_ids.append(user.id)
+        await self._refresh_settings(ctx.guild)
+
+        embed = discord.Embed(
+            title="User Exempted",
+            description=f"{user.mention} can now message in the trap channel without being punished.",
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+    @honeypot_exempt_user.command(name="remove")
+    @commands.admin()
+    async def honeypot_exempt_user_remove(self, ctx: commands.Context, user: discord.User):
+        """Remove a user from the exemption list."""
+        async with self.config.guild(ctx.guild).exempt_user_ids() as user_ids:
+            if user.id not in user_ids:
+                embed = discord.Embed(
+                    title="Not Exempt",
+                    description=f"{user.mention} is not on the exemption list.",
+                    color=discord.Color.orange(),
+                )
+                await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+                return
+            user_ids.remove(user.id)
+        await self._refresh_settings(ctx.guild)
+
+        embed = discord.Embed(
+            title="User Removed",
+            description=f"{user.mention} is no longer exempt from the honeypot.",
+            color=discord.Color.red(),
+        )
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+    @honeypot_exempt.group(name="permission", aliases=["perm", "perms"], invoke_without_command=True)
+    @commands.admin()
+    async def honeypot_exempt_permission(self, ctx: commands.Context):
+        """Manage permissions that exempt whoever holds them."""
         await self._send_exempt_list(ctx)
 
+    @honeypot_exempt_permission.command(name="add")
+    @commands.admin()
+    async def honeypot_exempt_permission_add(self, ctx: commands.Context, *, permission: str):
+        """Exempt members who have a permission, e.g. `manage_messages`."""
+        await self._update_exempt_permission(ctx, permission, enable=True)
+
+    @honeypot_exempt_permission.command(name="remove")
+    @commands.admin()
+    async def honeypot_exempt_permission_remove(self, ctx: commands.Context, *, permission: str):
+        """Stop exempting members because of a permission."""
+        await self._update_exempt_permission(ctx, permission, enable=False)
+
+    @honeypot_exempt.command(name="accountage")
+    @commands.admin()
+    async def honeypot_exempt_account_age(
+        self,
+        ctx: commands.Context,
+        *,
+        age: commands.TimedeltaConverter(
+            maximum=MAX_EXEMPT_AGE,
+            allowed_units=["weeks", "days", "hours"],
+            default_unit="days",
+        ),
+    ):
+        """Exempt accounts older than `age` (0 disables)."""
+        seconds = int(age.total_seconds())
+        await self.config.guild(ctx.guild).exempt_account_age.set(seconds)
+        await self._refresh_settings(ctx.guild)
+        if seconds:
+            description = f"Accounts older than **{humanize_timedelta(seconds=seconds)}** are exempt."
+        else:
+            description = "Account age no longer grants an exemption."
+        embed = discord.Embed(
+            title="Exemptions Updated",
+            description=description,
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    @honeypot_exempt.command(name="joinage")
+    @commands.admin()
+    async def honeypot_exempt_join_age(
+        self,
+        ctx: commands.Context,
+        *,
+        age: commands.TimedeltaConverter(
+            maximum=MAX_EXEMPT_AGE,
+            allowed_units=["weeks", "days", "hours"],
+            default_unit="days",
+        ),
+    ):
+        """Exempt members who joined more than `age` ago (0 disables)."""
+        seconds = int(age.total_seconds())
+        await self.config.guild(ctx.guild).exempt_join_age.set(seconds)
+        await self._refresh_settings(ctx.guild)
+        if seconds:
+            description = f"Members who joined more than **{humanize_timedelta(seconds=seconds)}** ago are exempt."
+        else:
+            description = "Membership age no longer grants an exemption."
+        embed = discord.Embed(
+            title="Exemptions Updated",
+            description=description,
+            color=discord.Color.green(),
+        )
+        await ctx.send(embed=embed)
+
+    async def _update_exempt_permission(
+        self, ctx: commands.Context, permission: str, *, enable: bool
+    ):
+        name = permission.strip().lower().replace(" ", "_")
+        flag = discord.Permissions.VALID_FLAGS.get(name)
+        if flag is None:
+            embed = discord.Embed(
+                title="Unknown Permission",
+                description=f"`{name}` is not a Discord permission, e.g. use `manage_messages`.",
+                color=discord.Color.red(),
+            )
+            await ctx.send(embed=embed)
+            return
+
+        guild_conf = self.config.guild(ctx.guild)
+        value = await guild_conf.exempt_permissions()
+        value = value | flag if enable else value & ~flag
+        await guild_conf.exempt_permissions.set(value)
+        await self._refresh_settings(ctx.guild)
+        if enable:
+            embed = discord.Embed(
+                title="Permission Exempted",
+                description=f"Members with `{name}` can now message in the trap channel without being punished.",
+                color=discord.Color.green(),
+            )
+        else:
+            embed = discord.Embed(
+                title="Permission Removed",
+                description=f"`{name}` no longer grants an exemption.",
+                color=discord.Color.red(),
+            )
+        await ctx.send(embed=embed)
+
     async def _send_log(
         self,
         guild: discord.Guild,
         description: str,
         *,
         target: discord.abc.User = None,
-        view: discord.ui.View = None,
+        review: bool = False,
         deleted_message: str = None,
-    ):
-        log_channel_id = await self.config.guild(guild).log_channel_id()
+        offenders: str = None,
+    ) -> Optional[LogEntry]:
+        shed = self._shedding.get(guild.id)
+        if shed is not None:
+            shed.logs += 1
+            if target is not None:
+                shed.add_offender(target)
+            return None
+        settings = await self._get_settings(guild)
+        log_channel_id = settings.log_channel_id
         if not log_channel_id:
-            return
+            return None
 
         channel = guild.get_channel(log_channel_id)
         if not channel or not isinstance(channel, discord.TextChannel):
-            return
+            return None
 
         embed = discord.Embed(description=description, color=discord.Color.red())
         embed.timestamp = discord.utils.utcnow()
@@ -832,12 +3438,96 @@ class Honeypot(commands.Cog):
                     value=safe_text or "*No message content*",
                     inline=False,
                 )
+        if offenders:
+            safe_text = discord.utils.escape_markdown(offenders)
+            if len(safe_text) > 1024:
+                safe_text = f"{safe_text[:1021]}..."
+            embed.add_field(name="Offenders", value=safe_text, inline=False)
+
+        review_target = (target.id, str(target)) if review and target else None
+        entry = LogEntry(channel, embed, review_target)
+        self._queue_log(guild, entry)
+        return entry
+
+    async def _append_log_note(self, entry: LogEntry, note: str):
+        entry.embed.description = self._append_cleanup_note(entry.embed.description, note)
+        if not entry.sending:
+            # Still buffered; the digest will pick up the new description.
+            return
 
+        await entry.sent.wait()
+        if entry.message is None:
+            return
         try:
-            await channel.send(embed=embed, view=view)
+            await self._queue_call(
+                entry.channel.guild.id,
+                PRIORITY_LOG,
+                functools.partial(entry.message.edit, embeds=entry.embeds),
+            )
         except discord.HTTPException:
+            pass
+
+    def _queue_log(self, guild: discord.Guild, entry: LogEntry):
+        buffer = self._log_buffers.get(guild.id)
+        if buffer is None:
+            buffer = self._log_buffers[guild.id] = LogBuffer()
+        buffer.entries.append(entry)
+
+        if len(buffer) >= MAX_EMBEDS_PER_MESSAGE or self._unloading:
+            if buffer.timer:
+                buffer.timer.cancel()
+                buffer.timer = None
+            self._spawn(self._flush_log_buffer(guild.id))
+        elif buffer.timer is None:
+            buffer.timer = self._spawn(self._flush_log_buffer_later(guild.id))
+
+    async def _flush_log_buffer_later(self, guild_id: int):
+        await asyncio.sleep(LOG_FLUSH_DELAY)
+        buffer = self._log_buffers.get(guild_id)
+        if buffer is not None:
+            buffer.timer = None
+        await self._flush_log_buffer(guild_id)
+
+    async def _flush_log_buffer(self, guild_id: int):
+        buffer = self._log_buffers.get(guild_id)
+        if buffer is None:
             return
 
+        async with buffer.lock:
+            entries = buffer.take()
+            for batch in pack_entries(entries):
+                view = self._build_ban_review_view(
+                    guild_id,
+                    [entry.review_target for entry in batch if entry.review_target],
+                )
+                embeds = [entry.embed for entry in batch]
+                kwargs = {"embeds": embeds}
+                if view is not None:
+                    kwargs["view"] = view
+                for entry in batch:
+                    entry.sending = True
+                try:
+                    sent = await self._queue_call(
+                        guild_id,
+                        PRIORITY_LOG,
+                        functools.partial(batch[0].channel.send, **kwargs),
+                    )
+                except discord.HTTPException:
+                    sent = None
+                for entry in batch:
+                    entry.message = sent
+                    entry.embeds = embeds
+                    entry.sent.set()
+
+            if not buffer.entries and buffer.timer is None:
+                self._log_buffers.pop(guild_id, None)
+
+    async def _flush_all_logs(self):
+        await asyncio.gather(
+            *(self._flush_log_buffer(guild_id) for guild_id in list(self._log_buffers)),
+            return_exceptions=True,
+        )
+
 
 async def setup(bot):
     await bot.add_cog(Honeypot(bot))
@@ -0,0 +1,74 @@
+import time
+from typing import FrozenSet, Optional, Tuple
+
+import discord
+
+EXEMPT_ROLE = "role"
+EXEMPT_USER = "user"
+EXEMPT_PERMISSION = "permission"
+EXEMPT_ACCOUNT_AGE = "account age"
+EXEMPT_JOIN_AGE = "join age"
+
+
+def exemption_key(data: dict) -> Tuple:
+    """The config values a guild's exemption rules are compiled from."""
+    return (
+        frozenset(data.get("exempt_roles") or ()),
+        frozenset(data.get("exempt_user_ids") or ()),
+        int(data.get("exempt_permissions") or 0),
+        int(data.get("exempt_account_age") or 0),
+        int(data.get("exempt_join_age") or 0),
+    )
+
+
+class ExemptionRules:
+    """A guild's exemption settings compiled into one cheap predicate.
+
+    Calling the rules with a member returns the first matching reason, or
+    ``None`` when the member should be punished. Only set lookups, one
+    bitmask test and timestamp comparisons run per call.
+    """
+
+    __slots__ = ("key", "role_ids", "user_ids", "permissions", "account_age", "join_age")
+
+    def __init__(self, key: Tuple):
+        self.key = key
+        self.role_ids: FrozenSet[int]
+        self.user_ids: FrozenSet[int]
+        (
+            self.role_ids,
+            self.user_ids,
+            self.permissions,
+            self.account_age,
+            self.join_age,
+        ) = key
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.role_ids or self.user_ids or self.permissions or self.account_age or self.join_age
+        )
+
+    def __call__(self, member: discord.Member) -> Optional[str]:
+        if member.id in self.user_ids:
+            return EXEMPT_USER
+        if self.role_ids:
+            # Member._roles holds bare IDs, which avoids building Role objects.
+            role_ids = getattr(member, "_roles", None)
+            if role_ids is None:
+                role_ids = [role.id for role in member.roles]
+            if not self.role_ids.isdisjoint(role_ids):
+                return EXEMPT_ROLE
+        if self.permissions and member.guild_permissions.value & self.permissions:
+            return EXEMPT_PERMISSION
+        if self.account_age or self.join_age:
+            now = time.time()
+            if self.account_age and now - member.created_at.timestamp() >= self.account_age:
+                return EXEMPT_ACCOUNT_AGE
+            joined_at = member.joined_at
+            if (
+                self.join_age
+                and joined_at is not None
+                and now - joined_at.timestamp() >= self.join_age
+            ):
+                return EXEMPT_JOIN_AGE
+        return None
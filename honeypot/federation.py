@@ -0,0 +1,30 @@
+import asyncio
+import re
+from typing import Dict, FrozenSet, Optional, Tuple
+
+GROUP_NAME = re.compile(r"^[a-z0-9_-]{1,32}$")
+
+
+class FederatedBatch:
+    """Users tripped elsewhere in a federation, waiting to be banned in one guild."""
+
+    __slots__ = ("group", "users", "timer")
+
+    def __init__(self, group: str):
+        self.group = group
+        # user ID -> (display name, source guild ID, source guild name)
+        self.users: Dict[int, Tuple[str, int, str]] = {}
+        self.timer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def add(self, user_id: int, name: str, source_id: int, source_name: str):
+        self.users.setdefault(user_id, (name, source_id, source_name))
+
+
+def group_index(groups: Dict[str, list]) -> Tuple[Dict[str, FrozenSet[int]], Dict[int, str]]:
+    """Member guilds per group, and the group each guild belongs to."""
+    members = {name: frozenset(guild_ids) for name, guild_ids in groups.items()}
+    by_guild = {guild_id: name for name, guild_ids in members.items() for guild_id in guild_ids}
+    return members, by_guild
@@ -0,0 +1,122 @@
+import re
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, List, Tuple
+
+import discord
+
+# Shorter texts ("hi", "gm", "lol") are posted identically by unrelated people.
+MIN_CONTENT_LENGTH = 20
+
+_INVISIBLE = re.compile("[\u00ad\u034f\u180e\u200b-\u200f\u2060-\u2064\ufeff]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_content(content: str) -> str:
+    """Fold the tricks spam waves use to dodge exact matching: case, width, spacing."""
+    content = unicodedata.normalize("NFKC", content)
+    content = _INVISIBLE.sub("", content)
+    return _WHITESPACE.sub(" ", content).strip().casefold()
+
+
+def message_fingerprints(message: discord.Message) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Hashes identifying a message's text, and each of its attachments.
+
+    Discord does not expose attachment content hashes and downloading every
+    upload is not an option, so attachments are identified by size, type and
+    name, which a re-posted image keeps. Unrelated uploads (``image.png``
+    from the same phone) can share those too, so attachment fingerprints are
+    returned separately from the text one as weaker evidence.
+    """
+    text = []
+    content = normalize_content(message.content or "")
+    if len(content) >= MIN_CONTENT_LENGTH:
+        text.append(hash(("content", content)))
+    attachments = []
+    for attachment in message.attachments:
+        attachments.append(
+            hash(
+                (
+                    "attachment",
+                    attachment.size,
+                    attachment.content_type,
+                    (attachment.filename or "").casefold(),
+                )
+            )
+        )
+    return tuple(text), tuple(attachments)
+
+
+class ContentIndex:
+    """Bounded, time-expiring index of recent guild messages by fingerprint.
+
+    Finding everyone who posted the same text or file is a dictionary lookup
+    per fingerprint instead of a history scan. The least recently posted
+    fingerprints are evicted once ``max_entries`` messages are held.
+    """
+
+    def __init__(self, *, max_age: float, per_fingerprint: int, max_entries: int):
+        self.max_age = max_age
+        self.per_fingerprint = per_fingerprint
+        self.max_entries = max_entries
+        self._size = 0
+        self._entries: "OrderedDict[Tuple[int, int], Deque[Tuple[float, int, int, int]]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    def record(
+        self,
+        guild_id: int,
+        fingerprints: Iterable[int],
+        author_id: int,
+        channel_id: int,
+        message_id: int,
+    ):
+        now = time.monotonic()
+        entries = self._entries
+        for fingerprint in fingerprints:
+            key = (guild_id, fingerprint)
+            messages = entries.get(key)
+            if messages is None:
+                messages = entries[key] = deque(maxlen=self.per_fingerprint)
+            else:
+                entries.move_to_end(key)
+            if len(messages) < self.per_fingerprint:
+                self._size += 1
+            messages.append((now, author_id, channel_id, message_id))
+        while self._size > self.max_entries:
+            _, messages = entries.popitem(last=False)
+            self._size -= len(messages)
+
+    def pop_matches(
+        self, guild_id: int, fingerprints: Iterable[int], *, exclude_author: int
+    ) -> Dict[int, Dict[int, List[int]]]:
+        """Remove and return author ID -> channel ID -> message IDs sharing a fingerprint.
+
+        Popping means concurrent trips from the same wave do not sweep the
+        same messages twice.
+        """
+        since = time.monotonic() - self.max_age
+        matches: Dict[int, Dict[int, List[int]]] = {}
+        # A message with text and attachments is indexed under several fingerprints.
+        seen = set()
+        for fingerprint in fingerprints:
+            messages = self._entries.pop((guild_id, fingerprint), None)
+            if messages is None:
+                continue
+            self._size -= len(messages)
+            for timestamp, author_id, channel_id, message_id in messages:
+                if timestamp < since or author_id == exclude_author or message_id in seen:
+                    continue
+                seen.add(message_id)
+                channels = matches.setdefault(author_id, {})
+                channels.setdefault(channel_id, []).append(message_id)
+        return matches
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
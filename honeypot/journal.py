@@ -0,0 +1,233 @@
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, List, Optional, Tuple
+
+EVENT_TRIP = "trip"
+EVENT_EXEMPT = "exempt"
+EVENT_CLEANUP = "cleanup"
+EVENT_REVIEW_BAN = "review_ban"
+EVENT_SWEEP = "sweep"
+EVENT_FEDERATED_BAN = "federated_ban"
+
+JOURNAL_COLUMNS = (
+    "id",
+    "ts",
+    "guild_id",
+    "user_id",
+    "channel_id",
+    "message_id",
+    "event",
+    "action",
+    "outcome",
+    "deleted",
+    "detail",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER,
+    channel_id INTEGER,
+    message_id INTEGER,
+    event TEXT NOT NULL,
+    action TEXT,
+    outcome TEXT,
+    deleted INTEGER,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS journal_guild_ts ON journal (guild_id, ts);
+CREATE INDEX IF NOT EXISTS journal_ts ON journal (ts);
+CREATE INDEX IF NOT EXISTS journal_user ON journal (user_id);
+"""
+
+Row = Tuple
+
+
+class TripJournal:
+    """Append-only SQLite log of honeypot activity, written off the event loop.
+
+    ``record`` only enqueues; a background task drains the queue and inserts
+    each batch in a single transaction on a dedicated thread, which also owns
+    the connection. When the queue is full new rows are dropped and counted
+    rather than letting memory grow.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        batch_size: int,
+        flush_interval: float,
+        max_pending: int,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "asyncio.Queue[Row]" = asyncio.Queue(maxsize=max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="honeypot-journal")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    async def open(self):
+        await self._run(self._open)
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        await self.flush()
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+    def record(
+        self,
+        event: str,
+        guild_id: int,
+        *,
+        user_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        action: Optional[str] = None,
+        outcome: Optional[str] = None,
+        deleted: Optional[int] = None,
+        detail: Optional[dict] = None,
+    ):
+        row = (
+            time.time(),
+            guild_id,
+            user_id,
+            channel_id,
+            message_id,
+            event,
+            action,
+            outcome,
+            deleted,
+            json.dumps(detail, separators=(",", ":")) if detail else None,
+        )
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def flush(self):
+        """Write everything queued so far."""
+        while not self._queue.empty():
+            await self._run(self._insert, self._take(self.batch_size))
+
+    async def prune(self, older_than: float) -> int:
+        return await self._run(self._prune, older_than)
+
+    async def count(self, guild_id: int) -> Tuple[int, Optional[float]]:
+        return await self._run(self._count, guild_id)
+
+    async def delete_user(self, user_id: int):
+        await self.flush()
+        await self._run(self._delete_user, user_id)
+
+    async def export(self, fp: IO[str], guild_id: int, since: float, page_size: int) -> int:
+        """Write the guild's rows since ``since`` to ``fp`` as JSON lines, one page at a time."""
+        await self.flush()
+        written = 0
+        last_id = 0
+        while True:
+            rows = await self._run(self._page, guild_id, since, last_id, page_size)
+            if not rows:
+                return written
+            await self._run(_write_jsonl, fp, rows)
+            written += len(rows)
+            last_id = rows[-1][0]
+
+    async def _write_loop(self):
+        while True:
+            first = await self._queue.get()
+            try:
+                # Give a burst a moment to accumulate into one transaction.
+                await asyncio.sleep(self.flush_interval)
+            except asyncio.CancelledError:
+                await self._run(self._insert, [first, *self._take(self.batch_size - 1)])
+                raise
+            batch = [first, *self._take(self.batch_size - 1)]
+            try:
+                await self._run(self._insert, batch)
+            except sqlite3.Error:
+                self.dropped += len(batch)
+
+    def _take(self, limit: int) -> List[Row]:
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return rows
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # Everything below runs on the journal thread.
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._conn = conn
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _insert(self, rows: List[Row]):
+        if not rows:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO journal (ts, guild_id, user_id, channel_id, message_id, event,"
+                " action, outcome, deleted, detail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _prune(self, older_than: float) -> int:
+        with self._conn:
+            return self._conn.execute("DELETE FROM journal WHERE ts < ?", (older_than,)).rowcount
+
+    def _count(self, guild_id: int) -> Tuple[int, Optional[float]]:
+        return self._conn.execute(
+            "SELECT COUNT(*), MIN(ts) FROM journal WHERE guild_id = ?", (guild_id,)
+        ).fetchone()
+
+    def _delete_user(self, user_id: int):
+        with self._conn:
+            self._conn.execute("DELETE FROM journal WHERE user_id = ?", (user_id,))
+
+    def _page(self, guild_id: int, since: float, after_id: int, limit: int) -> List[Row]:
+        return self._conn.execute(
+            f"SELECT {', '.join(JOURNAL_COLUMNS)} FROM journal"
+            " WHERE guild_id = ? AND ts >= ? AND id > ? ORDER BY id LIMIT ?",
+            (guild_id, since, after_id, limit),
+        ).fetchall()
+
+
+def _write_jsonl(fp: IO[str], rows: List[Row]):
+    for row in rows:
+        data = dict(zip(JOURNAL_COLUMNS, row))
+        if data["detail"]:
+            data["detail"] = json.loads(data["detail"])
+        for key in ("guild_id", "user_id", "channel_id", "message_id"):
+            # Snowflakes exceed JavaScript's safe integer range.
+            if data[key] is not None:
+                data[key] = str(data[key])
+        fp.write(json.dumps(data, separators=(",", ":")))
+        fp.write("\n")
+
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Iterator, List, Optional, Tuple
+
+import discord
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS = 6000
+
+
+class LogEntry:
+    """One embed waiting to be posted to a guild's log channel."""
+
+    __slots__ = ("channel", "embed", "review_target", "sending", "sent", "message", "embeds")
+
+    def __init__(
+        self,
+        channel: discord.abc.Messageable,
+        embed: discord.Embed,
+        review_target: Optional[Tuple[int, str]] = None,
+    ):
+        self.channel = channel
+        self.embed = embed
+        self.review_target = review_target
+        self.sending = False
+        self.sent = asyncio.Event()
+        # Set once the digest containing this entry has been posted, so later
+        # updates can edit the message in place.
+        self.message: Optional[discord.Message] = None
+        self.embeds: List[discord.Embed] = []
+
+
+class LogBuffer:
+    """Pending log entries for one guild, flushed as multi-embed digests."""
+
+    __slots__ = ("entries", "timer", "lock")
+
+    def __init__(self):
+        self.entries: List[LogEntry] = []
+        self.timer: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def take(self) -> List[LogEntry]:
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def pack_entries(entries: List[LogEntry]) -> Iterator[List[LogEntry]]:
+    """Group entries into messages that respect Discord's per-message embed limits."""
+    batch: List[LogEntry] = []
+    size = 0
+    for entry in entries:
+        entry_size = len(entry.embed)
+        if batch and (
+            batch[0].channel.id != entry.channel.id
+            or len(batch) >= MAX_EMBEDS_PER_MESSAGE
+            or size + entry_size > MAX_EMBED_CHARACTERS
+        ):
+            yield batch
+            batch, size = [], 0
+        batch.append(entry)
+        size += entry_size
+    if batch:
+        yield batch
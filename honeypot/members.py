@@ -0,0 +1,53 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import discord
+
+
+class MemberCache:
+    """Small TTL/LRU of members resolved over REST.
+
+    Lets the cog work with the bot's member cache disabled without fetching
+    the same offender again for every message of a burst.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[float, discord.Member]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, guild_id: int, user_id: int) -> Optional[discord.Member]:
+        key = (guild_id, user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, member = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return member
+
+    def put(self, member: discord.Member):
+        key = (member.guild.id, member.id)
+        self._entries[key] = (time.monotonic() + self.ttl, member)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def replace(self, member: discord.Member):
+        """Refresh an entry that is already cached, e.g. after a member update."""
+        if (member.guild.id, member.id) in self._entries:
+            self.put(member)
+
+    def discard(self, guild_id: int, user_id: int):
+        self._entries.pop((guild_id, user_id), None)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,52 @@
+import time
+from typing import Dict
+
+import discord
+
+
+def overloaded(inflight_trips: int, trip_threshold: int, *, factor: float = 1.0) -> bool:
+    """Whether trips in progress are at ``factor`` times the threshold (0 disables it)."""
+    return bool(trip_threshold) and inflight_trips >= trip_threshold * factor
+
+
+class ShedState:
+    """What one guild skipped while its trip pipeline was degraded."""
+
+    __slots__ = (
+        "started",
+        "trips",
+        "cleanups",
+        "logs",
+        "offenders",
+        "offender_limit",
+        "unlisted",
+        "watcher",
+    )
+
+    def __init__(self, offender_limit: int):
+        self.started = time.monotonic()
+        self.trips = 0
+        self.cleanups = 0
+        self.logs = 0
+        # Bounded so a long raid cannot grow the summary without limit.
+        self.offenders: Dict[int, str] = {}
+        self.offender_limit = offender_limit
+        self.unlisted = 0
+        self.watcher = None
+
+    def add_trip(self, user: discord.abc.User):
+        self.trips += 1
+        self.add_offender(user)
+
+    def add_offender(self, user: discord.abc.User):
+        """Remember someone whose log entry was skipped, without counting a trip."""
+        if user.id in self.offenders:
+            return
+        if len(self.offenders) < self.offender_limit:
+            self.offenders[user.id] = str(user)
+        else:
+            self.unlisted += 1
+
+    @property
+    def duration(self) -> float:
+        return time.monotonic() - self.started
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import List, Optional, Tuple
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+class SamplingProfiler:
+    """Statistical profiler for the cog's share of the event loop.
+
+    Nothing is installed until ``run`` is awaited, and everything is removed
+    when it returns. Where the platform allows it, a ``SIGPROF`` interval
+    timer interrupts the loop thread every ``interval`` seconds of process
+    CPU time, so samples land on whatever code is actually executing.
+    Elsewhere a helper thread reads the loop thread's frame instead; that
+    only catches stretches that hold the GIL for longer than the switch
+    interval, which are also the ones that stall the bot.
+
+    Only stacks passing through this package are kept. Frames above the
+    outermost cog frame (the event loop, discord.py's dispatch) are cut off,
+    while library calls made by the cog are kept so their cost is attributed
+    to the caller.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.elapsed = 0.0
+        self.mode = "timer" if _timer_available() else "thread"
+        self._stop = threading.Event()
+
+    @property
+    def hits(self) -> int:
+        return sum(self.stacks.values())
+
+    def stop(self):
+        self._stop.set()
+
+    async def run(self, duration: float):
+        """Sample for ``duration`` seconds, or until ``stop`` is called."""
+        started = time.perf_counter()
+        try:
+            if self.mode == "timer":
+                await self._run_timer(duration)
+            else:
+                # The sampler blocks its thread, never the event loop it is watching.
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._run_thread, threading.get_ident(), duration
+                )
+        finally:
+            self.elapsed = time.perf_counter() - started
+
+    async def _run_timer(self, duration: float):
+        deadline = time.perf_counter() + duration
+        previous = signal.signal(signal.SIGPROF, self._on_signal)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        try:
+            while not self._stop.is_set():
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, 0.25))
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, previous)
+
+    def _on_signal(self, signum, frame: Optional[FrameType]):
+        self._sample(frame)
+
+    def _run_thread(self, thread_id: int, duration: float):
+        deadline = time.perf_counter() + duration
+        while not self._stop.wait(self.interval):
+            self._sample(sys._current_frames().get(thread_id))
+            if time.perf_counter() >= deadline:
+                break
+
+    def _sample(self, frame: Optional[FrameType]):
+        self.samples += 1
+        labels = []
+        outermost = None
+        while frame is not None:
+            code = frame.f_code
+            labels.append(code)
+            if code.co_filename.startswith(PACKAGE_DIR):
+                outermost = len(labels)
+            frame = frame.f_back
+        if outermost is not None:
+            # Labels are built when reporting; sampling only keeps code objects.
+            self.stacks[tuple(reversed(labels[:outermost]))] += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the ``root;child;leaf count`` format read by flame graph tools."""
+        return "".join(
+            f"{';'.join(_label(code) for code in stack)} {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+    def top(self, limit: int) -> str:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for code in set(stack):
+                total[code] += count
+        samples = max(self.samples, 1)
+        lines = [
+            f"{self.samples} samples ({self.mode}) over {self.elapsed:.1f}s, "
+            f"{self.hits} ({self.hits / samples:.1%}) inside the honeypot cog",
+            "",
+            f"{'own':>7} {'total':>7}  function",
+        ]
+        rows: List[Tuple[int, int, str]] = [
+            (count, own[code], _label(code)) for code, count in total.items()
+        ]
+        rows.sort(reverse=True)
+        for total_count, own_count, label in rows[:limit]:
+            lines.append(f"{own_count / samples:>7.1%} {total_count / samples:>7.1%}  {label}")
+        return "\n".join(lines) + "\n"
+
+
+def _timer_available() -> bool:
+    # Signal handlers can only be installed from the main thread, which is
+    # where Red runs its event loop.
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def _label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(PACKAGE_DIR):
+        module = "honeypot/" + os.path.relpath(filename, PACKAGE_DIR)
+    else:
+        module = os.path.basename(filename)
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({module}:{code.co_firstlineno})"
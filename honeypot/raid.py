@@ -0,0 +1,47 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
+
+import discord
+
+
+class RaidDetector:
+    """Sliding-window trip counter that decides when a guild is being raided."""
+
+    __slots__ = ("_trips",)
+
+    def __init__(self):
+        self._trips: Deque[float] = deque()
+
+    def trip(self, threshold: int, window: float) -> bool:
+        """Record a trip and return whether the guild is in raid mode."""
+        now = time.monotonic()
+        trips = self._trips
+        trips.append(now)
+        expiry = now - window
+        while trips and trips[0] < expiry:
+            trips.popleft()
+        return bool(threshold) and len(trips) >= threshold
+
+    @property
+    def idle(self) -> bool:
+        return not self._trips
+
+
+class RaidBatch:
+    """Offenders collected during one coalescing window."""
+
+    __slots__ = ("offenders", "channel_mentions", "timer")
+
+    def __init__(self):
+        self.offenders: Dict[int, Tuple[discord.Member, discord.Message]] = {}
+        self.channel_mentions: Set[str] = set()
+        self.timer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.offenders)
+
+    def add(self, member: discord.Member, message: discord.Message):
+        self.offenders.setdefault(member.id, (member, message))
+        self.channel_mentions.add(message.channel.mention)
@@ -0,0 +1,118 @@
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class _AuthorHistory:
+    __slots__ = ("messages", "truncated")
+
+    def __init__(self, maxlen: int):
+        self.messages: Deque[Tuple[float, int, int]] = deque(maxlen=maxlen)
+        self.truncated = False
+
+
+class RecentMessageIndex:
+    """Bounded, time-expiring index of recent message IDs per guild member.
+
+    Lets cleanup delete an offender's messages by ID instead of scanning
+    channel history. Coverage starts per guild when ``watch`` is called, so
+    ``lookup`` returns ``None`` whenever the index cannot vouch for having
+    seen every message in the requested window.
+    """
+
+    def __init__(self, *, max_age: float, per_author: int, max_authors: int):
+        self.max_age = max_age
+        self.per_author = per_author
+        self.max_authors = max_authors
+        # Floor for every guild, raised by eviction and clear().
+        self.covered_since = time.monotonic()
+        self._guilds: Dict[int, float] = {}
+        self._authors: "OrderedDict[Tuple[int, int], _AuthorHistory]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._authors)
+
+    def watch(self, guild_id: int):
+        """Start vouching for ``guild_id`` from now on; a no-op if already watched."""
+        self._guilds.setdefault(guild_id, time.monotonic())
+
+    def unwatch(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    def record(self, guild_id: int, author_id: int, channel_id: int, message_id: int):
+        now = time.monotonic()
+        key = (guild_id, author_id)
+        history = self._authors.get(key)
+        if history is None:
+            history = self._authors[key] = _AuthorHistory(self.per_author)
+            self._evict(now)
+        else:
+            self._authors.move_to_end(key)
+            messages = history.messages
+            if len(messages) == self.per_author and messages[0][0] > now - self.max_age:
+                history.truncated = True
+        history.messages.append((now, channel_id, message_id))
+
+    def lookup(
+        self, guild_id: int, author_id: int, window: float
+    ) -> Optional[Dict[int, List[int]]]:
+        """Map channel ID -> message IDs the author sent within ``window`` seconds."""
+        now = time.monotonic()
+        since = now - window
+        started = self._guilds.get(guild_id)
+        if started is None or max(started, self.covered_since) > since:
+            return None
+
+        history = self._authors.get((guild_id, author_id))
+        if history is None:
+            return {}
+        if history.truncated:
+            return None
+
+        by_channel: Dict[int, List[int]] = {}
+        for timestamp, channel_id, message_id in history.messages:
+            if timestamp >= since:
+                by_channel.setdefault(channel_id, []).append(message_id)
+        return by_channel
+
+    def discard(self, guild_id: int, author_id: int):
+        self._authors.pop((guild_id, author_id), None)
+
+    def clear(self):
+        self._authors.clear()
+        self.covered_since = time.monotonic()
+
+    def _evict(self, now: float):
+        expiry = now - self.max_age
+        authors = self._authors
+        while len(authors) > self.max_authors:
+            _, history = authors.popitem(last=False)
+            if history.messages and history.messages[-1][0] > expiry:
+                # A live author fell out of the index; older windows are no
+                # longer complete.
+                self.covered_since = now
+
+
+class SeenIds:
+    """Bounded LRU of IDs, used to drop events the gateway delivers twice."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._ids: "OrderedDict[int, None]" = OrderedDict()
+
+    def __contains__(self, item: int) -> bool:
+        return item in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, item: int) -> bool:
+        """Remember ``item``; return ``False`` if it had already been seen."""
+        ids = self._ids
+        if item in ids:
+            ids.move_to_end(item)
+            return False
+        ids[item] = None
+        if len(ids) > self.maxsize:
+            ids.popitem(last=False)
+        return True
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from typing import FrozenSet, Optional
+
+from .exemptions import ExemptionRules, exemption_key
+
+
+def trap_channel_ids(data: dict) -> FrozenSet[int]:
+    """Return every trap channel, including the legacy single ``channel_id``."""
+    channel_ids = set(data.get("channel_ids") or ())
+    legacy_id = data.get("channel_id")
+    if legacy_id:
+        channel_ids.add(legacy_id)
+    return frozenset(channel_ids)
+
+
+class GuildSettings:
+    """Immutable snapshot of a guild's honeypot configuration."""
+
+    __slots__ = (
+        "trap_channel_ids",
+        "exemptions",
+        "log_channel_id",
+        "action",
+        "punish_role_id",
+        "remove_other_roles",
+        "role_exception_ids",
+        "cleanup_concurrency",
+        "cleanup_time_budget",
+        "raid_threshold",
+        "raid_window",
+        "cleanup_mode",
+        "ban_delete_seconds",
+        "shed_trip_threshold",
+        "sweep_mode",
+        "federation_opt_in",
+    )
+
+    def __init__(self, data: dict, previous: Optional["GuildSettings"] = None):
+        self.trap_channel_ids = trap_channel_ids(data)
+        key = exemption_key(data)
+        if previous is not None and previous.exemptions.key == key:
+            # Unrelated setting changed; keep the already compiled rules.
+            self.exemptions = previous.exemptions
+        else:
+            self.exemptions = ExemptionRules(key)
+        self.log_channel_id = data.get("log_channel_id")
+        self.action = (data.get("action") or "ban").lower()
+        self.punish_role_id = data.get("punish_role_id")
+        self.remove_other_roles = bool(data.get("remove_other_roles", False))
+        self.role_exception_ids = frozenset(data.get("role_exception_ids") or ())
+        self.cleanup_concurrency = max(1, int(data.get("cleanup_concurrency") or 1))
+        self.cleanup_time_budget = float(data.get("cleanup_time_budget") or 0) or None
+        self.raid_threshold = int(data.get("raid_threshold") or 0)
+        self.raid_window = float(data.get("raid_window") or 10)
+        self.cleanup_mode = (data.get("cleanup_mode") or "both").lower()
+        self.ban_delete_seconds = int(data.get("ban_delete_seconds") or 0)
+        self.shed_trip_threshold = int(data.get("shed_trip_threshold") or 0)
+        self.sweep_mode = (data.get("sweep_mode") or "off").lower()
+        self.federation_opt_in = bool(data.get("federation_opt_in"))
+
+    @property
+    def server_delete_seconds(self) -> int:
+        """History Discord should delete when banning, per the cleanup mode."""
+        if self.cleanup_mode == "scan":
+            return 0
+        return self.ban_delete_seconds
+
+    def scans_after(self, action: str) -> bool:
+        """Whether the bot must sweep history itself after ``action``."""
+        return not (action == "ban" and self.cleanup_mode == "server")
+
+
+class GuildSettingsCache:
+    """LRU of guild snapshots so the message path never touches Config."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[int, GuildSettings]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, guild_id: int) -> Optional[GuildSettings]:
+        settings = self._entries.get(guild_id)
+        if settings is not None:
+            self._entries.move_to_end(guild_id)
+        return settings
+
+    def put(self, guild_id: int, settings: GuildSettings):
+        self._entries[guild_id] = settings
+        self._entries.move_to_end(guild_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, guild_id: int):
+        self._entries.pop(guild_id, None)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,176 @@
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import discord
+
+from .workqueue import WorkDropped
+
+STAGE_TRIP = "trip"
+STAGE_DELETE = "delete"
+STAGE_PUNISH = "punish"
+STAGE_CLEANUP = "cleanup"
+STAGE_CLEANUP_CALL = "cleanup_call"
+STAGE_LOG = "log"
+STAGES = (STAGE_TRIP, STAGE_DELETE, STAGE_PUNISH, STAGE_CLEANUP, STAGE_CLEANUP_CALL, STAGE_LOG)
+# Stages timing a single call; the others wrap several, so an error there
+# has already been counted once.
+CALL_STAGES = frozenset((STAGE_DELETE, STAGE_PUNISH, STAGE_CLEANUP_CALL, STAGE_LOG))
+
+# Upper bounds in seconds; the final implicit bucket is +Inf.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    return f"{seconds:.1f} s"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; memory does not grow with observations."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        index = 0
+        for bound in BUCKETS:
+            if seconds <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min or self.count == 1:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by interpolating inside the bucket that holds it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.counts):
+            upper = BUCKETS[index] if index < len(BUCKETS) else self.max
+            if bucket_count and seen + bucket_count >= rank:
+                # Narrow the bucket to the observed range before interpolating.
+                low, high = max(lower, self.min), min(upper, self.max)
+                return low + (high - low) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = upper
+        return self.max
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        running = 0
+        for index, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            yield (repr(BUCKETS[index]) if index < len(BUCKETS) else "+Inf"), running
+
+
+class StageCounters:
+    __slots__ = ("failures", "http_errors", "rate_limited", "shed")
+
+    def __init__(self):
+        self.failures = 0
+        self.http_errors = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+
+class _StageTimer:
+    __slots__ = ("stats", "stage", "started")
+
+    def __init__(self, stats: "HoneypotStats", stage: str):
+        self.stats = stats
+        self.stage = stage
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stats = self.stats
+        stats.histograms[self.stage].observe(time.perf_counter() - self.started)
+        if exc_type is not None:
+            stats.record_error(self.stage, exc)
+        return False
+
+
+class HoneypotStats:
+    """Process-wide per-stage timings and error counters."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.time()
+        self.histograms: Dict[str, Histogram] = {stage: Histogram() for stage in STAGES}
+        self.counters: Dict[str, StageCounters] = {stage: StageCounters() for stage in STAGES}
+
+    def time(self, stage: str) -> _StageTimer:
+        return _StageTimer(self, stage)
+
+    def record_error(self, stage: str, exc: BaseException):
+        if not isinstance(exc, Exception):
+            # Cancellation is not a failure.
+            return
+        counters = self.counters[stage]
+        if isinstance(exc, WorkDropped):
+            counters.shed += 1
+            return
+        counters.failures += 1
+        if isinstance(exc, discord.RateLimited):
+            rate_limited = True
+        elif isinstance(exc, discord.HTTPException):
+            counters.http_errors += 1
+            rate_limited = exc.status == 429
+        else:
+            rate_limited = False
+        if rate_limited:
+            counters.rate_limited += 1
+
+    @property
+    def rate_limited(self) -> int:
+        return sum(self.counters[stage].rate_limited for stage in CALL_STAGES)
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP honeypot_stage_seconds Time spent in each honeypot stage.",
+            "# TYPE honeypot_stage_seconds histogram",
+        ]
+        for stage, histogram in self.histograms.items():
+            for bound, count in histogram.cumulative():
+                lines.append(f'honeypot_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'honeypot_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+            lines.append(f'honeypot_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        for name, help_text in (
+            ("failures", "Stage attempts that raised an error."),
+            ("http_errors", "Stage attempts that failed with an HTTPException."),
+            ("shed", "Low-priority calls dropped because the work queue was deep."),
+        ):
+            lines.append(f"# HELP honeypot_{name}_total {help_text}")
+            lines.append(f"# TYPE honeypot_{name}_total counter")
+            for stage, counters in self.counters.items():
+                lines.append(f'honeypot_{name}_total{{stage="{stage}"}} {getattr(counters, name)}')
+
+        lines.append("# HELP honeypot_rate_limited_total 429 responses returned to honeypot calls.")
+        lines.append("# TYPE honeypot_rate_limited_total counter")
+        lines.append(f"honeypot_rate_limited_total {self.rate_limited}")
+        lines.append("# HELP honeypot_stats_start_time_seconds When these counters were last reset.")
+        lines.append("# TYPE honeypot_stats_start_time_seconds gauge")
+        lines.append(f"honeypot_stats_start_time_seconds {self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, List, Optional
+
+import discord
+
+from .workqueue import WorkDropped
+
+TRACE_VERSION = 1
+
+RECORD_HEADER = "header"
+RECORD_GUILD = "guild"
+RECORD_MESSAGE = "message"
+RECORD_CALL = "call"
+
+RESULT_TRIP = "trip"
+RESULT_INFLIGHT = "inflight"
+RESULT_EXEMPT = "exempt"
+
+
+def call_route(factory) -> str:
+    """A readable name for a queued REST call, e.g. ``Message.delete``."""
+    func = getattr(factory, "func", factory)
+    return getattr(func, "__qualname__", type(func).__name__)
+
+
+def call_outcome(exc: Optional[BaseException]) -> str:
+    if exc is None:
+        return "ok"
+    if isinstance(exc, WorkDropped):
+        return "dropped"
+    if isinstance(exc, discord.RateLimited):
+        return "rate_limited"
+    if isinstance(exc, discord.HTTPException):
+        return f"http_{exc.status}"
+    if isinstance(exc, asyncio.CancelledError):
+        return "cancelled"
+    return "error"
+
+
+class TraceRecorder:
+    """Anonymized JSON-lines trace of trap traffic and the REST calls it causes.
+
+    Every ID is replaced by a keyed hash whose key is never written out, so
+    the trace keeps the shape of an incident (who tripped which trap, how
+    often, how long each call took) without identifying anyone. Records are
+    buffered in memory and appended from a dedicated thread; once
+    ``max_bytes`` have been accepted, further records are counted as dropped.
+    """
+
+    def __init__(self, path: Path, *, max_bytes: int, flush_interval: float, max_pending: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.started = time.monotonic()
+        self.records = 0
+        self.dropped = 0
+        self.accepted_bytes = 0
+        self._key = os.urandom(16)
+        self._guilds = set()
+        self._pending: List[str] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="honeypot-trace")
+        self._fp: Optional[IO[str]] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    @property
+    def full(self) -> bool:
+        return self.accepted_bytes >= self.max_bytes
+
+    async def open(self):
+        self._fp = await self._run(self._open)
+        self._add({"type": RECORD_HEADER, "version": TRACE_VERSION})
+        self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        await self._flush()
+        await self._run(self._fp.close)
+        self._executor.shutdown(wait=True)
+
+    def anonymize(self, snowflake: Optional[int]) -> Optional[int]:
+        if snowflake is None:
+            return None
+        digest = hashlib.blake2b(
+            snowflake.to_bytes(8, "big"), key=self._key, digest_size=6
+        ).digest()
+        # 48 bits stay exact in JSON readers that use doubles.
+        return int.from_bytes(digest, "big")
+
+    def guild_seen(self, guild_id: int) -> bool:
+        return guild_id in self._guilds
+
+    def guild(self, guild: discord.Guild, settings: dict):
+        self._guilds.add(guild.id)
+        self._add(
+            {
+                "type": RECORD_GUILD,
+                "guild": self.anonymize(guild.id),
+                "text_channels": len(guild.text_channels),
+                "voice_channels": len(guild.voice_channels),
+                "threads": len(getattr(guild, "threads", ())),
+                "members": getattr(guild, "member_count", None),
+                "settings": settings,
+            }
+        )
+
+    def message(self, message: discord.Message, result: str, reason: Optional[str] = None):
+        self._add(
+            {
+                "type": RECORD_MESSAGE,
+                "t": self._offset(),
+                "guild": self.anonymize(message.guild.id),
+                "channel": self.anonymize(message.channel.id),
+                "author": self.anonymize(message.author.id),
+                "message": self.anonymize(message.id),
+                "result": result,
+                "reason": reason,
+            }
+        )
+
+    def call(self, guild_id: int, stage: str, route: str, outcome: str, latency: float):
+        self._add(
+            {
+                "type": RECORD_CALL,
+                "t": self._offset(),
+                "guild": self.anonymize(guild_id),
+                "stage": stage,
+                "route": route,
+                "outcome": outcome,
+                "latency": round(latency, 6),
+            }
+        )
+
+    def _offset(self) -> float:
+        return round(time.monotonic() - self.started, 6)
+
+    def _add(self, record: dict):
+        if self.full or len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        self.accepted_bytes += len(line)
+        self.records += 1
+        self._pending.append(line)
+
+    async def _write_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush()
+
+    async def _flush(self):
+        if self._pending:
+            lines, self._pending = self._pending, []
+            await self._run(self._write, lines)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # Everything below runs on the trace thread.
+
+    def _open(self) -> IO[str]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return open(self.path, "w", encoding="utf-8")
+
+    def _write(self, lines: List[str]):
+        self._fp.writelines(lines)
+        self._fp.flush()
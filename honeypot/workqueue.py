@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import heapq
+import itertools
+from typing import Awaitable, Callable, List, Optional, Set
+
+PRIORITY_PUNISH = 0
+PRIORITY_DELETE = 1
+PRIORITY_CLEANUP = 2
+PRIORITY_LOG = 3
+
+
+def _cancel_if_abandoned(task: asyncio.Task, future: asyncio.Future):
+    if future.cancelled():
+        task.cancel()
+
+
+class WorkDropped(Exception):
+    """Raised for low-priority work that was shed because the queue was deep."""
+
+
+class GuildWorkQueue:
+    """Priority queue of Discord API calls for one guild, drained by a few workers.
+
+    Punishments jump ahead of trigger deletion, which jumps ahead of history
+    cleanup and logging. Workers do not preempt running calls, so lower
+    priority work (above ``urgent_priority``) may only occupy
+    ``max_workers - 1`` workers at once; the last one is always free for a new
+    trip's delete and punishment. Droppable work is rejected outright once the
+    backlog reaches ``shed_depth`` so it cannot delay the calls that matter.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        shed_depth: int,
+        idle_timeout: float,
+        urgent_priority: int = PRIORITY_DELETE,
+    ):
+        self.max_workers = workers
+        self.background_workers = max(1, workers - 1)
+        self.shed_depth = shed_depth
+        self.idle_timeout = idle_timeout
+        self.urgent_priority = urgent_priority
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._workers: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._busy = 0
+        self._background_busy = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._heap)
+
+    def submit(
+        self,
+        priority: int,
+        factory: Callable[[], Awaitable],
+        *,
+        droppable: bool = False,
+    ) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if droppable and len(self._heap) >= self.shed_depth:
+            future.set_exception(WorkDropped())
+            return future
+
+        heapq.heappush(self._heap, (priority, next(self._counter), factory, future))
+        self._wakeup.set()
+        idle_workers = len(self._workers) - self._busy
+        if len(self._heap) > idle_workers and len(self._workers) < self.max_workers:
+            worker = asyncio.create_task(self._work())
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+        return future
+
+    async def run(
+        self,
+        priority: int,
+        factory: Callable[[], Awaitable],
+        *,
+        droppable: bool = False,
+    ):
+        return await self.submit(priority, factory, droppable=droppable)
+
+    async def close(self):
+        workers: List[asyncio.Task] = list(self._workers)
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        heap, self._heap = self._heap, []
+        for *_, future in heap:
+            if not future.done():
+                future.cancel()
+
+    def _take(self) -> Optional[tuple]:
+        heap = self._heap
+        while heap:
+            if (
+                heap[0][0] > self.urgent_priority
+                and self._background_busy >= self.background_workers
+            ):
+                return None
+            item = heapq.heappop(heap)
+            if not item[3].done():
+                return item
+        return None
+
+    async def _next(self) -> Optional[tuple]:
+        item = self._take()
+        while item is None:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.idle_timeout)
+            except asyncio.TimeoutError:
+                return self._take()
+            item = self._take()
+        return item
+
+    async def _work(self):
+        while True:
+            item = await self._next()
+            if item is None:
+                return
+            priority, _, factory, future = item
+            background = priority > self.urgent_priority
+
+            self._busy += 1
+            if background:
+                self._background_busy += 1
+            try:
+                task = asyncio.ensure_future(factory())
+                future.add_done_callback(functools.partial(_cancel_if_abandoned, task))
+                result = await task
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    # The worker itself is being torn down.
+                    future.cancel()
+                    raise
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._busy -= 1
+                if background:
+                    self._background_busy -= 1
+                    # Held-back background work may run on another worker now.
+                    self._wakeup.set()
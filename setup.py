@@ -7,7 +7,7 @@ setup(
     author="itsneufox",
     author_email="shout@neufox.com",
     url="https://github.com/itsneufox/neufox-honeypot-cog",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     install_requires=[
         "redbot>=3.5.0",
     ],